@@ -37,6 +37,14 @@ CHUNK_OVERLAP = 50
 EMBEDDING_MODEL = "BAAI/bge-base-en-v1.5"
 EMBEDDING_DIMENSION = 768
 
+# Chat embedder runtime ("onnx" falls back to "torch" when optimum is missing)
+EMBEDDER_BACKEND = os.getenv("EMBEDDER_BACKEND", "onnx").lower()
+EMBEDDER_NUM_THREADS = int(os.getenv("EMBEDDER_NUM_THREADS", str(os.cpu_count() or 1)))
+EMBEDDER_QUANTIZE = os.getenv("EMBEDDER_QUANTIZE", "false").lower() == "true"
+# Torch-backend weight precision: "float32" or "float16" (only worth it on CPUs with native fp16)
+EMBEDDER_DTYPE = os.getenv("EMBEDDER_DTYPE", "float32").lower()
+ONNX_EXPORT_DIR = CACHE_DIR / "onnx"
+
 # ========== OLLAMA CONFIG (NEW - REPLACE HuggingFace Config) ==========
 OLLAMA_ENABLED = os.getenv("OLLAMA_ENABLED", "true").lower() == "true"
 OLLAMA_MODEL_NAME = os.getenv("OLLAMA_MODEL_NAME", "mistral")
@@ -44,19 +52,35 @@ OLLAMA_BASE_URL = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
 OLLAMA_MAX_TOKENS = 256
 OLLAMA_TEMPERATURE = 0.7
 OLLAMA_TIMEOUT = 300
+# Concurrent generations are admitted in micro-batches of up to this size
+OLLAMA_BATCH_MAX_SIZE = int(os.getenv("OLLAMA_BATCH_MAX_SIZE", "8"))
+OLLAMA_BATCH_WINDOW_MS = int(os.getenv("OLLAMA_BATCH_WINDOW_MS", "20"))
 # ========== END OLLAMA CONFIG ==========
 
 # FAISS Config
 SIMILARITY_THRESHOLD = 0.5
 TOP_K_RETRIEVAL = 3
 MAX_RETRIEVAL_RESULTS = 150
+FAISS_NUM_THREADS = int(os.getenv("FAISS_NUM_THREADS", str(os.cpu_count() or 1)))
+# Single-query scans run on one core; indexes this large are split into thread shards
+FAISS_MAX_SHARDS = int(os.getenv("FAISS_MAX_SHARDS", "8"))
+FAISS_SHARD_MIN_VECTORS = int(os.getenv("FAISS_SHARD_MIN_VECTORS", "50000"))
 
 # Query / Cache Config
 QUERY_CACHE_MAX_SIZE = int(os.getenv("QUERY_CACHE_MAX_SIZE", "100"))
 QUERY_CACHE_TTL_SECONDS = int(os.getenv("QUERY_CACHE_TTL_SECONDS", "600"))
+# Paraphrased questions within a session reuse an earlier answer above this cosine score
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.95"))
+SEMANTIC_CACHE_TTL_SECONDS = int(os.getenv("SEMANTIC_CACHE_TTL_SECONDS", "300"))
+SEMANTIC_CACHE_MAX_ENTRIES = int(os.getenv("SEMANTIC_CACHE_MAX_ENTRIES", "128"))
 DEFAULT_PAGE_SIZE = int(os.getenv("DEFAULT_PAGE_SIZE", "5"))
 MAX_PAGE_SIZE = int(os.getenv("MAX_PAGE_SIZE", "25"))
 
+# Session Config
+# Set to share chat sessions across uvicorn workers (e.g. redis://localhost:6379/0)
+REDIS_URL = os.getenv("REDIS_URL", "")
+SESSION_TTL_SECONDS = int(os.getenv("SESSION_TTL_SECONDS", "86400"))
+
 # Batch Processing Config
 MAX_CONCURRENT_FILE_TASKS = int(os.getenv("MAX_CONCURRENT_FILE_TASKS", "3"))
 
@@ -1,5 +1,6 @@
 import faiss
 import numpy as np
+import orjson
 import pickle
 import logging
 from pathlib import Path
@@ -127,15 +128,18 @@ class FAISSManager:
             path.mkdir(parents=True, exist_ok=True)
             
             index_file = path / "index.faiss"
-            metadata_file = path / "metadata.pkl"
+            metadata_file = path / "metadata.json"
             
             # Write index
             faiss.write_index(self.index, str(index_file))
             logger.debug(f"  ✓ Index saved to {index_file}")
             
-            # Write metadata
-            with open(metadata_file, 'wb') as f:
-                pickle.dump(self.metadata, f)
+            # Write metadata (orjson: C-serialized, flat buffer, no pickle code execution)
+            temp_metadata_file = metadata_file.with_suffix('.tmp')
+            temp_metadata_file.write_bytes(
+                orjson.dumps(self.metadata, option=orjson.OPT_SERIALIZE_NUMPY)
+            )
+            temp_metadata_file.replace(metadata_file)
             logger.debug(f"  ✓ Metadata saved to {metadata_file}")
             
             logger.info(f"✅ Index saved to {path} ({self.index.ntotal} vectors)")
@@ -153,19 +157,24 @@ class FAISSManager:
         try:
             path = Path(path)
             index_file = path / "index.faiss"
-            metadata_file = path / "metadata.pkl"
+            metadata_file = path / "metadata.json"
+            legacy_metadata_file = path / "metadata.pkl"
             
-            if not index_file.exists() or not metadata_file.exists():
+            if not index_file.exists() or not (metadata_file.exists() or legacy_metadata_file.exists()):
                 raise FileNotFoundError(f"Index files not found in {path}")
             
             # Load index
             self.index = faiss.read_index(str(index_file))
             logger.debug(f"  ✓ Index loaded from {index_file}")
             
-            # Load metadata
-            with open(metadata_file, 'rb') as f:
-                self.metadata = pickle.load(f)
-            logger.debug(f"  ✓ Metadata loaded from {metadata_file}")
+            # Load metadata, falling back to indexes saved before the orjson switch
+            if metadata_file.exists():
+                self.metadata = orjson.loads(metadata_file.read_bytes())
+                logger.debug(f"  ✓ Metadata loaded from {metadata_file}")
+            else:
+                with open(legacy_metadata_file, 'rb') as f:
+                    self.metadata = pickle.load(f)
+                logger.debug(f"  ✓ Legacy metadata loaded from {legacy_metadata_file}")
             
             logger.info(f"✅ Index loaded from {path} ({self.index.ntotal} vectors)")
         except Exception as e:
@@ -0,0 +1,145 @@
+"""
+ONNX Runtime Sentence Encoder
+Runs a sentence-transformers style encoder through ONNX Runtime on CPU
+"""
+
+import logging
+from pathlib import Path
+from typing import List, Optional, Union
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class ONNXSentenceEncoder:
+    """Drop-in replacement for SentenceTransformer.encode backed by an ORT session.
+
+    The exported (and optionally int8-quantized) model is written to
+    ``export_dir`` once, so later startups only pay the session load.
+    """
+
+    def __init__(
+        self,
+        model_name: str,
+        export_dir: Path,
+        num_threads: Optional[int] = None,
+        quantize: bool = False,
+        pooling: str = "cls",
+        max_seq_length: int = 512
+    ):
+        """
+        Initialize the ONNX encoder.
+
+        Args:
+            model_name: HuggingFace model id (e.g. "BAAI/bge-small-en-v1.5")
+            export_dir: Directory holding the exported ONNX model
+            num_threads: Intra-op threads for the ORT session (None = ORT default)
+            quantize: Apply dynamic int8 (AVX512-VNNI) quantization after export
+            pooling: "cls" (BGE models) or "mean"
+            max_seq_length: Tokenizer truncation length
+        """
+        import onnxruntime as ort
+        from optimum.onnxruntime import ORTModelForFeatureExtraction
+        from transformers import AutoTokenizer
+
+        self.model_name = model_name
+        self.pooling = pooling
+        self.max_seq_length = max_seq_length
+
+        export_dir = Path(export_dir) / model_name.replace("/", "__")
+        session_options = ort.SessionOptions()
+        if num_threads:
+            session_options.intra_op_num_threads = num_threads
+            session_options.inter_op_num_threads = 1
+
+        if not (export_dir / "model.onnx").exists():
+            logger.info(f"📦 Exporting {model_name} to ONNX at {export_dir}...")
+            model = ORTModelForFeatureExtraction.from_pretrained(model_name, export=True)
+            model.save_pretrained(export_dir)
+            AutoTokenizer.from_pretrained(model_name).save_pretrained(export_dir)
+
+        file_name = "model.onnx"
+        if quantize:
+            file_name = self._quantize(export_dir)
+
+        self.tokenizer = AutoTokenizer.from_pretrained(export_dir)
+        self.model = ORTModelForFeatureExtraction.from_pretrained(
+            export_dir,
+            file_name=file_name,
+            provider="CPUExecutionProvider",
+            session_options=session_options
+        )
+        self.dimension = self.model.config.hidden_size
+        logger.info(f"✅ ONNX encoder ready: {model_name} ({file_name}, dim={self.dimension})")
+
+    @staticmethod
+    def _quantize(export_dir: Path) -> str:
+        """Quantize the exported model to int8 once and return its file name."""
+        quantized_name = "model_quantized.onnx"
+        if not (export_dir / quantized_name).exists():
+            from optimum.onnxruntime import ORTQuantizer
+            from optimum.onnxruntime.configuration import AutoQuantizationConfig
+
+            logger.info("🔧 Quantizing ONNX encoder to int8...")
+            quantizer = ORTQuantizer.from_pretrained(export_dir, file_name="model.onnx")
+            qconfig = AutoQuantizationConfig.avx512_vnni(is_static=False, per_channel=False)
+            quantizer.quantize(save_dir=export_dir, quantization_config=qconfig)
+        return quantized_name
+
+    def get_sentence_embedding_dimension(self) -> int:
+        """Get embedding dimension."""
+        return self.dimension
+
+    def encode(
+        self,
+        sentences: Union[str, List[str]],
+        batch_size: int = 32,
+        convert_to_numpy: bool = True,
+        normalize_embeddings: bool = True,
+        show_progress_bar: bool = False,
+        **kwargs
+    ) -> np.ndarray:
+        """
+        Encode sentences into embeddings.
+
+        Mirrors the SentenceTransformer.encode call shape used in this repo:
+        tokenize -> ORT forward -> pool -> L2-normalize.
+
+        Args:
+            sentences: A sentence or list of sentences
+            batch_size: Sentences per forward pass
+            normalize_embeddings: L2-normalize the output rows
+
+        Returns:
+            float32 array of shape (dim,) for a single sentence, else (N, dim)
+        """
+        single = isinstance(sentences, str)
+        if single:
+            sentences = [sentences]
+
+        embeddings = np.empty((len(sentences), self.dimension), dtype=np.float32)
+        for start in range(0, len(sentences), batch_size):
+            batch = sentences[start:start + batch_size]
+            inputs = self.tokenizer(
+                batch,
+                padding=True,
+                truncation=True,
+                max_length=self.max_seq_length,
+                return_tensors="np"
+            )
+            hidden = self.model(**inputs).last_hidden_state
+
+            if self.pooling == "cls":
+                pooled = hidden[:, 0]
+            else:
+                mask = inputs["attention_mask"][..., None].astype(np.float32)
+                pooled = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+
+            embeddings[start:start + len(batch)] = pooled
+
+        if normalize_embeddings:
+            norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+            embeddings /= np.clip(norms, 1e-12, None)
+
+        return embeddings[0] if single else embeddings
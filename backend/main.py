@@ -1,29 +1,41 @@
 # ============= backend/main.py (OPTIMIZED - MEMORY EFFICIENT) =============
 
 import os
+import atexit
 import logging
+import queue
 import asyncio
+import threading
+import hashlib
 import pickle
 import json
 import uuid
 import time
 import math
+from string import Template, punctuation
 from pathlib import Path
 from datetime import datetime
-from typing import Tuple, Dict, List, Optional, Any
+from typing import Tuple, Dict, List, Optional, Any, Set, AsyncIterator
 from contextlib import asynccontextmanager
+from logging.handlers import QueueHandler, QueueListener
 from collections import defaultdict, OrderedDict
 
 import faiss
+import httpx
 import numpy as np
-import requests
 from fastapi import FastAPI, UploadFile, File, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from pydantic import BaseModel, validator, Field
 import PyPDF2
 from document_processor.ocr_processor import EnhancedOCRProcessor as OCRProcessor
 from document_processor.table_extractor import TableExtractor
 from document_processor.loader import DocumentLoader
+from document_processor.pdf_text import get_process_pool, shutdown_process_pool
+from storage.metadata_store import ChunkMetadataStore
+from storage.session_store import ChatSession, create_session_store
+from utils.text_norm import load_budget_tokenizer
 
 from config import (
     ALLOWED_EXTENSIONS as CONFIG_ALLOWED_EXTENSIONS,
@@ -32,30 +44,60 @@ from config import (
     CHUNK_OVERLAP as CONFIG_CHUNK_OVERLAP,
     QUERY_CACHE_MAX_SIZE,
     QUERY_CACHE_TTL_SECONDS,
+    SEMANTIC_CACHE_THRESHOLD,
+    SEMANTIC_CACHE_TTL_SECONDS,
+    SEMANTIC_CACHE_MAX_ENTRIES,
     DEFAULT_PAGE_SIZE,
     MAX_PAGE_SIZE,
     MAX_RETRIEVAL_RESULTS,
-    MAX_CONCURRENT_FILE_TASKS
+    MAX_CONCURRENT_FILE_TASKS,
+    EMBEDDER_BACKEND,
+    EMBEDDER_NUM_THREADS,
+    EMBEDDER_QUANTIZE,
+    EMBEDDER_DTYPE,
+    ONNX_EXPORT_DIR,
+    FAISS_NUM_THREADS,
+    FAISS_MAX_SHARDS,
+    FAISS_SHARD_MIN_VECTORS,
+    OLLAMA_BASE_URL,
+    OLLAMA_MODEL_NAME,
+    OLLAMA_TIMEOUT,
+    OLLAMA_BATCH_MAX_SIZE,
+    OLLAMA_BATCH_WINDOW_MS,
+    REDIS_URL,
+    SESSION_TTL_SECONDS
 )
 # Removed summary-related imports
 # ============= LOGGING SETUP =============
 
 def setup_logging():
-    """Configure centralized logging with enhanced verbosity."""
+    """Configure centralized logging.
+
+    Records are handed to a QueueHandler and written by a background
+    QueueListener, so request and upload paths never block on log I/O.
+    """
     log_format = '%(asctime)s - [%(levelname)s] - %(name)s - %(message)s'
+    formatter = logging.Formatter(log_format)
+    
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(formatter)
+    file_handler = logging.FileHandler('app.log')
+    file_handler.setFormatter(formatter)
+    
+    log_queue: queue.Queue = queue.Queue(-1)
+    listener = QueueListener(log_queue, stream_handler, file_handler, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+    
     logging.basicConfig(
-        level=logging.DEBUG,  # Changed from INFO to DEBUG for more detailed logs
-        format=log_format,
-        handlers=[
-            logging.StreamHandler(),
-            logging.FileHandler('app.log')
-        ]
+        level=logging.INFO,
+        handlers=[QueueHandler(log_queue)]
     )
     logging.getLogger('filelock').setLevel(logging.WARNING)
     logging.getLogger('httpx').setLevel(logging.WARNING)
     logging.getLogger('httpcore').setLevel(logging.WARNING)
-    logging.getLogger('document_processor').setLevel(logging.DEBUG)
-    logging.getLogger('__main__').setLevel(logging.DEBUG)
+    logging.getLogger('document_processor').setLevel(logging.INFO)
+    logging.getLogger('__main__').setLevel(logging.INFO)
     logging.getLogger('uvicorn').setLevel(logging.INFO)
     logging.getLogger('uvicorn.error').setLevel(logging.INFO)
     logging.getLogger('uvicorn.access').setLevel(logging.INFO)
@@ -88,27 +130,45 @@ logger.info("="*80)
 # ============= SHARED RESOURCES =============
 
 class QueryCache:
-    """In-memory TTL cache for frequent query responses."""
+    """In-memory TTL cache for frequent query responses.
+
+    Entries are spread over lock-sharded LRU buckets keyed by a compact
+    blake2b digest, so concurrent lookups rarely contend on the same lock.
+    """
+
+    NUM_SHARDS = 16
 
     def __init__(self, max_size: int, ttl_seconds: int):
         self.max_size = max_size
         self.ttl_seconds = ttl_seconds
-        self._cache: OrderedDict = OrderedDict()
-        self._lock = asyncio.Lock()
+        self._shard_max_size = max(1, math.ceil(max_size / self.NUM_SHARDS))
+        self._shards: List[OrderedDict] = [OrderedDict() for _ in range(self.NUM_SHARDS)]
+        self._locks: List[asyncio.Lock] = [asyncio.Lock() for _ in range(self.NUM_SHARDS)]
+        # chat_id -> keys stored for that session, for O(|session|) invalidation
+        self._session_index: Dict[str, Set[bytes]] = defaultdict(set)
 
     def _make_key(
         self,
         chat_id: str,
         query: str,
         selected_file_ids: Optional[List[str]]
-    ) -> str:
+    ) -> bytes:
         normalized_query = query.strip().lower()
-        files_key = tuple(sorted(selected_file_ids or []))
-        return json.dumps({
-            "chat_id": chat_id,
-            "query": normalized_query,
-            "files": files_key
-        }, sort_keys=True)
+        files_key = ','.join(sorted(selected_file_ids or []))
+        return hashlib.blake2b(
+            f"{chat_id}\0{normalized_query}\0{files_key}".encode('utf-8'),
+            digest_size=16
+        ).digest()
+
+    def _shard_for(self, key: bytes) -> int:
+        return key[0] % self.NUM_SHARDS
+
+    def _forget(self, chat_id: str, key: bytes) -> None:
+        keys = self._session_index.get(chat_id)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._session_index[chat_id]
 
     async def get(
         self,
@@ -117,18 +177,21 @@ class QueryCache:
         selected_file_ids: Optional[List[str]]
     ) -> Optional[Dict[str, Any]]:
         key = self._make_key(chat_id, query, selected_file_ids)
-        async with self._lock:
-            cache_entry = self._cache.get(key)
+        shard_id = self._shard_for(key)
+        shard = self._shards[shard_id]
+        async with self._locks[shard_id]:
+            cache_entry = shard.get(key)
             if not cache_entry:
                 return None
 
-            timestamp, value = cache_entry
+            timestamp, _, value = cache_entry
             if time.time() - timestamp > self.ttl_seconds:
-                self._cache.pop(key, None)
+                shard.pop(key, None)
+                self._forget(chat_id, key)
                 return None
 
             # Move to end to denote recent use
-            self._cache.move_to_end(key)
+            shard.move_to_end(key)
             return value
 
     async def set(
@@ -139,39 +202,143 @@ class QueryCache:
         value: Dict[str, Any]
     ) -> None:
         key = self._make_key(chat_id, query, selected_file_ids)
-        async with self._lock:
-            if key in self._cache:
-                self._cache.move_to_end(key)
-            self._cache[key] = (time.time(), value)
-
-            # Evict oldest entries beyond max size
-            while len(self._cache) > self.max_size:
-                self._cache.popitem(last=False)
+        shard_id = self._shard_for(key)
+        shard = self._shards[shard_id]
+        async with self._locks[shard_id]:
+            if key in shard:
+                shard.move_to_end(key)
+            shard[key] = (time.time(), chat_id, value)
+            self._session_index[chat_id].add(key)
+
+            # Evict oldest entries beyond the shard's share of max size
+            while len(shard) > self._shard_max_size:
+                evicted_key, (_, evicted_chat_id, _) = shard.popitem(last=False)
+                self._forget(evicted_chat_id, evicted_key)
 
     async def clear(self) -> None:
-        async with self._lock:
-            self._cache.clear()
+        for shard, lock in zip(self._shards, self._locks):
+            async with lock:
+                shard.clear()
+        self._session_index.clear()
 
     async def invalidate_session(self, chat_id: str) -> None:
-        async with self._lock:
-            keys_to_remove = [key for key in self._cache.keys() if json.loads(key).get("chat_id") == chat_id]
-            for key in keys_to_remove:
-                self._cache.pop(key, None)
+        keys_to_remove = self._session_index.pop(chat_id, set())
+        for key in keys_to_remove:
+            shard_id = self._shard_for(key)
+            async with self._locks[shard_id]:
+                self._shards[shard_id].pop(key, None)
+
+
+class SemanticResponseCache:
+    """Answer cache matched on query-embedding cosine similarity.
+
+    Each (chat_id, selected files) bucket keeps an IndexFlatIP of normalized
+    query embeddings with a parallel entry list, so a paraphrase of an
+    earlier question returns its answer instead of re-running RAG + LLM.
+    Buckets for a chat are dropped when new documents are indexed into it.
+    """
+
+    def __init__(self, threshold: float, ttl_seconds: int, max_entries: int):
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        # (chat_id, files_key) -> (index, [[last_used, created, value], ...])
+        self._buckets: Dict[Tuple[str, str], Tuple[faiss.Index, List[List[Any]]]] = {}
+
+    @staticmethod
+    def _bucket_key(chat_id: str, selected_files: Optional[List[str]]) -> Tuple[str, str]:
+        return chat_id, '\0'.join(sorted(selected_files or []))
+
+    @staticmethod
+    def _remove(index: faiss.Index, entries: List[List[Any]], position: int) -> None:
+        # Flat indexes compact on removal, keeping ids aligned with entries
+        index.remove_ids(np.array([position], dtype=np.int64))
+        del entries[position]
+
+    def get(
+        self,
+        chat_id: str,
+        selected_files: Optional[List[str]],
+        query_embedding: np.ndarray
+    ) -> Optional[Any]:
+        """
+        Look up an answer for a normalized (1, dim) query embedding.
+        
+        Returns:
+            Cached value if a stored query scores >= threshold, else None
+        """
+        bucket = self._buckets.get(self._bucket_key(chat_id, selected_files))
+        if bucket is None or bucket[0].ntotal == 0:
+            return None
+
+        index, entries = bucket
+        scores, ids = index.search(query_embedding, 1)
+        position = int(ids[0][0])
+        if position < 0 or scores[0][0] < self.threshold:
+            return None
+
+        now = time.time()
+        entry = entries[position]
+        if now - entry[1] > self.ttl_seconds:
+            self._remove(index, entries, position)
+            return None
+
+        entry[0] = now
+        return entry[2]
+
+    def set(
+        self,
+        chat_id: str,
+        selected_files: Optional[List[str]],
+        query_embedding: np.ndarray,
+        value: Any
+    ) -> None:
+        """Store a value under a normalized (1, dim) query embedding."""
+        key = self._bucket_key(chat_id, selected_files)
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = (faiss.IndexFlatIP(query_embedding.shape[1]), [])
+            self._buckets[key] = bucket
+
+        index, entries = bucket
+        now = time.time()
+        index.add(query_embedding)
+        entries.append([now, now, value])
+
+        # Evict the least recently used entry beyond max size
+        if len(entries) > self.max_entries:
+            lru_position = min(range(len(entries)), key=lambda i: entries[i][0])
+            self._remove(index, entries, lru_position)
+
+    def invalidate_session(self, chat_id: str) -> None:
+        """Drop every bucket belonging to a chat session."""
+        for key in [key for key in self._buckets if key[0] == chat_id]:
+            del self._buckets[key]
 
 
 class SharedResources:
     """Memory-efficient resource management."""
     
     def __init__(self):
-        self.faiss_indices: Dict[str, faiss.IndexFlatIP] = {}
-        self.metadata_dict: Dict[str, List[Dict]] = {}
+        self.faiss_indices: Dict[str, faiss.Index] = {}
+        self.metadata_dict: Dict[str, ChunkMetadataStore] = {}
+        # chat_id -> (ntotal when built, sharded search view)
+        self.search_indices: Dict[str, Tuple[int, faiss.Index]] = {}
         self.chat_document_mapping: Dict[str, List[str]] = {}
         self.lock = asyncio.Lock()
         self.embedder = None
+        # Stateless per-request helpers, built once and reused
+        self.table_extractor: Optional[TableExtractor] = None
+        self.document_analyzer = None
         self.query_cache = QueryCache(
             max_size=QUERY_CACHE_MAX_SIZE,
             ttl_seconds=QUERY_CACHE_TTL_SECONDS
         )
+        self.semantic_cache = SemanticResponseCache(
+            threshold=SEMANTIC_CACHE_THRESHOLD,
+            ttl_seconds=SEMANTIC_CACHE_TTL_SECONDS,
+            max_entries=SEMANTIC_CACHE_MAX_ENTRIES
+        )
         
         logger.info("✅ SharedResources initialized")
     
@@ -188,18 +355,52 @@ shared_resources = SharedResources()
 
 # ============= EMBEDDER INITIALIZATION =============
 
+EMBEDDER_MODEL_NAME = 'BAAI/bge-small-en-v1.5'  # Smaller model (~100MB vs 500MB)
+
+def _configure_torch_threads():
+    """Pin torch to all cores for intra-op work and a single inter-op pool."""
+    import torch
+
+    torch.set_num_threads(EMBEDDER_NUM_THREADS)
+    try:
+        torch.set_num_interop_threads(1)
+    except RuntimeError:
+        # Can only be set once, before any inter-op parallel work has started
+        pass
+
 def get_embedder():
-    """Get singleton embedder - LIGHTWEIGHT VERSION."""
+    """Get singleton embedder - LIGHTWEIGHT VERSION.
+
+    Prefers an ONNX Runtime session (exported once, cached on disk) and falls
+    back to the torch SentenceTransformer when optimum/onnxruntime are missing.
+    """
     if shared_resources.embedder is None:
         logger.info("📚 Initializing lightweight embedder...")
         try:
-            from sentence_transformers import SentenceTransformer
-            
-            # Use lightweight model to save memory
-            shared_resources.embedder = SentenceTransformer(
-                'BAAI/bge-small-en-v1.5',  # Smaller model (~100MB vs 500MB)
-                device='cpu'
-            )
+            _configure_torch_threads()
+
+            if EMBEDDER_BACKEND == "onnx":
+                try:
+                    from embedding.onnx_encoder import ONNXSentenceEncoder
+
+                    shared_resources.embedder = ONNXSentenceEncoder(
+                        EMBEDDER_MODEL_NAME,
+                        export_dir=ONNX_EXPORT_DIR,
+                        num_threads=EMBEDDER_NUM_THREADS,
+                        quantize=EMBEDDER_QUANTIZE
+                    )
+                except Exception as e:
+                    logger.warning(f"⚠️ ONNX backend unavailable ({e}), using torch")
+
+            if shared_resources.embedder is None:
+                from sentence_transformers import SentenceTransformer
+
+                shared_resources.embedder = SentenceTransformer(
+                    EMBEDDER_MODEL_NAME,
+                    device='cpu'
+                )
+                if EMBEDDER_DTYPE == "float16":
+                    shared_resources.embedder.half()
             
             global EMBEDDING_DIM
             EMBEDDING_DIM = shared_resources.embedder.get_sentence_embedding_dimension()
@@ -209,6 +410,18 @@ def get_embedder():
             raise
     return shared_resources.embedder
 
+def get_table_extractor() -> TableExtractor:
+    """Get singleton table extractor."""
+    if shared_resources.table_extractor is None:
+        shared_resources.table_extractor = TableExtractor()
+    return shared_resources.table_extractor
+
+def get_document_analyzer():
+    """Get singleton enhanced document analyzer bound to the shared embedder."""
+    if shared_resources.document_analyzer is None:
+        shared_resources.document_analyzer = EnhancedDocumentAnalyzer(embedder=get_embedder())
+    return shared_resources.document_analyzer
+
 # ============= TEXT EXTRACTION (PyPDF2 + OCR) =============
 
 def extract_text_from_pdf(pdf_path: Path) -> Tuple[str, List[str]]:
@@ -236,7 +449,7 @@ def extract_text_from_pdf(pdf_path: Path) -> Tuple[str, List[str]]:
                     page_text = page.extract_text()
                     if page_text and page_text.strip():
                         text += f"\n--- Page {page_num + 1} ---\n{page_text}"
-                        logger.debug(f"  ✓ Page {page_num + 1}: {len(page_text)} chars")
+                        logger.debug("  ✓ Page %d: %d chars", page_num + 1, len(page_text))
                 except Exception as e:
                     logger.warning(f"  ⚠️ Page {page_num + 1} extraction failed: {e}")
                     errors.append(f"Page {page_num + 1} failed")
@@ -270,6 +483,33 @@ def extract_text_from_pdf(pdf_path: Path) -> Tuple[str, List[str]]:
 
 # ============= TEXT CHUNKING (OPTIMIZED) =============
 
+def _pack_sentence_spans(lengths: np.ndarray, chunk_size: int) -> List[int]:
+    """Greedily pack sentences into chunks, returning each chunk's start index.
+
+    Works on sentence character lengths only (1 token ≈ 4 chars, plus the
+    2-char ". " joiner), so the loop is pure integer arithmetic and can be
+    compiled by numba when it is installed.
+    """
+    starts = [0]
+    current_len = 0
+    for i in range(len(lengths)):
+        length = lengths[i]
+        if current_len // 4 + length // 4 > chunk_size:
+            if current_len > 0:
+                starts.append(i)
+            current_len = length
+        elif current_len > 0:
+            current_len += length + 2
+        else:
+            current_len = length
+    return starts
+
+try:
+    import numba
+    _pack_sentence_spans = numba.njit(cache=True)(_pack_sentence_spans)
+except ImportError:
+    pass
+
 def improved_semantic_text_chunking(
     text: str,
     chunk_size: int = CHUNK_SIZE,
@@ -292,59 +532,127 @@ def improved_semantic_text_chunking(
         return []
     
     # Split by sentences for better semantic boundaries
-    sentences = text.split('. ')
+    sentences = [s for s in (sentence.strip() for sentence in text.split('. ')) if s]
     logger.info(f"  📝 Text split into {len(sentences)} sentences")
     
-    chunks = []
-    current_chunk = ""
-    
-    for sentence in sentences:
-        sentence = sentence.strip()
-        if not sentence:
-            continue
-        
-        # Approximate: 1 token ≈ 4 characters
-        current_size = len(current_chunk) // 4
-        sentence_size = len(sentence) // 4
-        
-        if current_size + sentence_size > chunk_size:
-            if current_chunk.strip():
-                chunks.append(current_chunk.strip())
-                logger.debug(f"  ✓ Chunk: {len(current_chunk)//4} tokens")
-            current_chunk = sentence
-        else:
-            current_chunk += ". " + sentence if current_chunk else sentence
+    if not sentences:
+        return []
     
-    # Add final chunk
-    if current_chunk.strip():
-        chunks.append(current_chunk.strip())
-        logger.debug(f"  ✓ Final chunk: {len(current_chunk)//4} tokens")
+    # Pack on lengths, then join each span once (no repeated string growth)
+    lengths = np.fromiter((len(s) for s in sentences), dtype=np.int64, count=len(sentences))
+    starts = list(_pack_sentence_spans(lengths, chunk_size))
+    ends = starts[1:] + [len(sentences)]
+    chunks = [". ".join(sentences[start:end]) for start, end in zip(starts, ends)]
     
     logger.info(f"✅ Chunking complete: {len(chunks)} chunks created")
     return chunks
 
 # ============= FAISS INDEX MANAGEMENT =============
 
-def load_faiss_index(chat_id: str) -> Tuple[Optional[faiss.IndexFlatIP], Optional[List[Dict]]]:
-    """Load FAISS index and metadata."""
+def create_faiss_index(dimension: int) -> faiss.Index:
+    """Create an empty inner-product index storing vectors as fp16.
+
+    QT_fp16 needs no training and halves index RAM and scan bandwidth
+    versus IndexFlatIP; scores match to fp16 precision.
+    """
+    return faiss.IndexScalarQuantizer(
+        dimension,
+        faiss.ScalarQuantizer.QT_fp16,
+        faiss.METRIC_INNER_PRODUCT
+    )
+
+_metadata_store_lock = threading.Lock()
+
+def _import_legacy_metadata(legacy_path: Path, store_path: Path, content_path: Path) -> None:
+    """Import a legacy pickle into temp files, then move them into place.
+
+    The database appears only once the import is complete, so a failed
+    import leaves nothing behind and is retried on the next open.
+    """
+    logger.info(f"  📦 Migrating legacy metadata from {legacy_path.name}...")
+    tmp_store_path = store_path.with_name(store_path.name + ".tmp")
+    tmp_content_path = content_path.with_name(content_path.name + ".tmp")
+    for path in (tmp_store_path, tmp_content_path):
+        path.unlink(missing_ok=True)
+    
+    try:
+        tmp_store = ChunkMetadataStore(tmp_store_path, tmp_content_path)
+        with open(legacy_path, 'rb') as f:
+            tmp_store.import_legacy(pickle.load(f))
+        tmp_store.close()
+        tmp_content_path.touch()
+        # Content first: the database is what marks the import as done
+        os.replace(tmp_content_path, content_path)
+        os.replace(tmp_store_path, store_path)
+    except Exception:
+        for path in (tmp_store_path, tmp_content_path):
+            path.unlink(missing_ok=True)
+        raise
+
+def get_metadata_store(chat_id: str) -> ChunkMetadataStore:
+    """Return the chat's chunk metadata store, opened (and legacy pickles imported) once."""
+    store = shared_resources.metadata_dict.get(chat_id)
+    if store is not None:
+        return store
+    
+    with _metadata_store_lock:
+        store = shared_resources.metadata_dict.get(chat_id)
+        if store is not None:
+            return store
+        
+        store_path = VECTOR_STORE_DIR / f"metadata_{chat_id}.sqlite"
+        content_path = VECTOR_STORE_DIR / f"content_{chat_id}.bin"
+        legacy_path = VECTOR_STORE_DIR / f"metadata_{chat_id}.pickle"
+        if not store_path.exists() and legacy_path.exists():
+            _import_legacy_metadata(legacy_path, store_path, content_path)
+        
+        store = ChunkMetadataStore(store_path, content_path)
+        shared_resources.metadata_dict[chat_id] = store
+        return store
+
+def get_search_index(chat_id: str, index: faiss.Index) -> faiss.Index:
+    """Return a thread-sharded view of a large index for single-query search.
+
+    FAISS parallelizes over queries, so a single query scans on one core.
+    Above FAISS_SHARD_MIN_VECTORS the corpus is split across an IndexShards
+    whose shards are scanned on separate threads. The view is cached until
+    the index grows.
+    """
+    num_shards = min(FAISS_NUM_THREADS, FAISS_MAX_SHARDS)
+    if index.ntotal < FAISS_SHARD_MIN_VECTORS or num_shards < 2:
+        return index
+    
+    cached = shared_resources.search_indices.get(chat_id)
+    if cached and cached[0] == index.ntotal:
+        return cached[1]
+    
+    logger.info(f"  🧩 Building {num_shards}-way sharded search index ({index.ntotal} vectors)...")
+    vectors = index.reconstruct_n(0, index.ntotal)
+    shards = faiss.IndexShards(index.d, True, True)  # threaded, successive_ids
+    for part in np.array_split(vectors, num_shards):
+        sub_index = create_faiss_index(index.d)
+        sub_index.add(np.ascontiguousarray(part))
+        shards.add_shard(sub_index)
+    
+    shared_resources.search_indices[chat_id] = (index.ntotal, shards)
+    return shards
+
+def load_faiss_index(chat_id: str) -> Tuple[Optional[faiss.Index], Optional[ChunkMetadataStore]]:
+    """Load FAISS index and its metadata store."""
     logger.info(f"📂 Loading FAISS index for chat_id: {chat_id}")
     
     index_path = VECTOR_STORE_DIR / f"faiss_index_{chat_id}.bin"
-    metadata_path = VECTOR_STORE_DIR / f"metadata_{chat_id}.pickle"
     
-    if not index_path.exists() or not metadata_path.exists():
-        logger.warning(f"  ⚠️ Index or metadata files not found")
+    if not index_path.exists():
+        logger.warning(f"  ⚠️ Index file not found")
         return None, None
     
     try:
-        logger.debug(f"  Loading index from {index_path.name}...")
+        logger.debug("  Loading index from %s...", index_path.name)
         index = faiss.read_index(str(index_path))
-        logger.debug(f"  ✓ Index loaded: {index.ntotal} vectors")
+        logger.debug("  ✓ Index loaded: %d vectors", index.ntotal)
         
-        logger.debug(f"  Loading metadata from {metadata_path.name}...")
-        with open(metadata_path, 'rb') as f:
-            metadata = pickle.load(f)
-        logger.debug(f"  ✓ Metadata loaded: {len(metadata)} entries")
+        metadata = get_metadata_store(chat_id)
         
         logger.info(f"✅ FAISS index loaded successfully")
         return index, metadata
@@ -353,6 +661,8 @@ def load_faiss_index(chat_id: str) -> Tuple[Optional[faiss.IndexFlatIP], Optiona
         logger.error(f"❌ Failed to load FAISS index: {e}")
         return None, None
 
+EMBED_BATCH_SIZE = 64
+
 def add_to_faiss_index(
     filename: str,
     text_chunks: List[str],
@@ -371,81 +681,88 @@ def add_to_faiss_index(
         embedder = get_embedder()
         logger.info(f"  🔢 Encoding {len(text_chunks)} chunks...")
         
-        # Encode in batches to save memory
-        batch_size = 32
-        all_embeddings = []
-        
-        for i in range(0, len(text_chunks), batch_size):
-            batch = text_chunks[i:i+batch_size]
-            batch_embeddings = embedder.encode(batch, convert_to_numpy=True)
-            all_embeddings.extend(batch_embeddings)
-            logger.debug(f"  ✓ Encoded batch {i//batch_size + 1}/{(len(text_chunks)-1)//batch_size + 1}")
-        
-        embeddings = np.array(all_embeddings, dtype=np.float32)
-        logger.debug(f"  ✓ Embeddings created: shape {embeddings.shape}")
-        
-        # Normalize for cosine similarity
-        faiss.normalize_L2(embeddings)
-        logger.debug(f"  ✓ Embeddings normalized")
+        # Encode in length-sorted batches so each batch pads to similar lengths,
+        # scattering rows straight into one preallocated matrix in chunk order.
+        # Normalized by the encoder for cosine similarity.
+        order = np.argsort([len(chunk) for chunk in text_chunks], kind='stable')
+        embeddings = np.empty((len(text_chunks), EMBEDDING_DIM), dtype=np.float32)
+        for start in range(0, len(order), EMBED_BATCH_SIZE):
+            batch_rows = order[start:start + EMBED_BATCH_SIZE]
+            embeddings[batch_rows] = embedder.encode(
+                [text_chunks[i] for i in batch_rows],
+                batch_size=EMBED_BATCH_SIZE,
+                show_progress_bar=False,
+                convert_to_numpy=True,
+                normalize_embeddings=True
+            )
+        logger.debug("  ✓ Embeddings created: shape %s", embeddings.shape)
         
-        # Create or load index
+        # Reuse the in-memory index when warm; fall back to disk only when cold.
+        # Callers serialize appends per process (see shared_resources.lock).
         index_path = VECTOR_STORE_DIR / f"faiss_index_{chat_id}.bin"
-        metadata_path = VECTOR_STORE_DIR / f"metadata_{chat_id}.pickle"
         
-        if index_path.exists():
+        if chat_id in shared_resources.faiss_indices:
+            logger.info(f"  ♻️ Reusing in-memory index...")
+            index = shared_resources.faiss_indices[chat_id]
+            metadata = shared_resources.metadata_dict[chat_id]
+        elif index_path.exists():
             logger.info(f"  📂 Loading existing index...")
             index, metadata = load_faiss_index(chat_id)
             if index is None:
                 logger.warning("  ⚠️ Creating new index")
-                index = faiss.IndexFlatIP(EMBEDDING_DIM)
-                metadata = []
+                index = create_faiss_index(EMBEDDING_DIM)
+                metadata = get_metadata_store(chat_id)
         else:
             logger.info(f"  ✨ Creating new FAISS index...")
-            index = faiss.IndexFlatIP(EMBEDDING_DIM)
-            metadata = []
+            index = create_faiss_index(EMBEDDING_DIM)
+            metadata = get_metadata_store(chat_id)
+        
+        # Row ids continue from the index, which is the source of truth
+        base_index = index.ntotal
         
         # Add embeddings
         logger.info(f"  ➕ Adding {len(embeddings)} embeddings...")
         index.add(embeddings)
-        logger.debug(f"  ✓ Index now contains {index.ntotal} vectors")
+        logger.debug("  ✓ Index now contains %d vectors", index.ntotal)
         
-        # Create metadata
+        # Create metadata (one wall-clock timestamp for the whole batch)
+        timestamp = datetime.now().isoformat()
         chunk_metadata = []
         for idx, chunk in enumerate(text_chunks):
             chunk_metadata.append({
-                'chunk_id': f"{chat_id}_chunk_{len(metadata) + idx}",
+                'chunk_id': f"{chat_id}_chunk_{base_index + idx}",
                 'filename': filename,
                 'chat_id': chat_id,
-                'content': chunk[:500],  # Store only first 500 chars to save memory
-                'timestamp': datetime.now().isoformat(),
-                'chunk_index': len(metadata) + idx
+                'content': chunk,
+                'timestamp': timestamp,
+                'chunk_index': base_index + idx
             })
         
-        metadata.extend(chunk_metadata)
-        logger.debug(f"  ✓ Metadata updated: {len(metadata)} entries")
-        
         # ATOMIC PERSISTENCE
         logger.info(f"  💾 Atomically persisting index and metadata...")
         temp_index_path = index_path.with_suffix('.tmp.bin')
-        temp_metadata_path = metadata_path.with_suffix('.tmp.pickle')
         
         try:
             faiss.write_index(index, str(temp_index_path))
-            logger.debug(f"  ✓ Temp index written")
+            logger.debug("  ✓ Temp index written")
             
-            with open(temp_metadata_path, 'wb') as f:
-                pickle.dump(metadata, f)
-            logger.debug(f"  ✓ Temp metadata written")
+            # Rows are keyed by FAISS id, so a retry after a failed replace
+            # simply overwrites them
+            metadata.append(chunk_metadata)
+            logger.debug("  ✓ Metadata rows committed")
             
             # Atomic replace
             temp_index_path.replace(index_path)
-            temp_metadata_path.replace(metadata_path)
-            logger.info(f"  ✓ Files atomically replaced")
+            logger.info(f"  ✓ Index atomically replaced")
             
         except Exception as e:
             logger.error(f"  ❌ Failed to persist: {e}")
             temp_index_path.unlink(missing_ok=True)
-            temp_metadata_path.unlink(missing_ok=True)
+            # The index was mutated in place; drop it so the next add reloads from disk
+            shared_resources.faiss_indices.pop(chat_id, None)
+            stale_store = shared_resources.metadata_dict.pop(chat_id, None)
+            if stale_store is not None:
+                stale_store.close()
             raise
         
         # Update in-memory cache
@@ -461,14 +778,16 @@ def add_to_faiss_index(
 
 # ============= RETRIEVAL =============
 
-def get_filenames_from_file_ids(session_id: str, file_ids: List[str]) -> List[str]:
+async def get_filenames_from_file_ids(session_id: str, file_ids: List[str]) -> List[str]:
     """Map file_ids to filenames from session data."""
-    if session_id not in sessions:
+    files = await sessions.get_files(session_id)
+    if files is None:
         return []
     
+    wanted = set(file_ids)
     filenames = []
-    for file_record in sessions[session_id].files:
-        if file_record.get("file_id") in file_ids:
+    for file_record in files:
+        if file_record.get("file_id") in wanted:
             filenames.append(file_record.get("filename"))
     
     return filenames
@@ -481,53 +800,64 @@ def retrieve_all_chunks_for_files(
     logger.info(f"📚 Retrieving ALL chunks for comprehensive analysis...")
     
     try:
-        logger.info(f"  📂 Loading FAISS index for session {chat_id}...")
+        logger.debug("  📂 Loading FAISS index for session %s...", chat_id)
         index, metadata = load_faiss_index(chat_id)
         
         if index is None or metadata is None:
-            logger.warning(f"  ⚠️ No index found for session {chat_id}")
+            logger.warning("  ⚠️ No index found for session %s", chat_id)
             return []
         
-        # Collect all chunks from selected files
+        # Collect all chunks from selected files (filtered in SQL)
         all_chunks = []
-        for idx, meta in enumerate(metadata):
-            if selected_files and meta['filename'] not in selected_files:
-                continue
-            
+        for meta in metadata.get_by_filenames(selected_files):
             chunk_info = {
                 'content': meta['content'],
                 'filename': meta['filename'],
                 'chunk_id': meta['chunk_id'],
                 'page': meta.get('page', 'unknown'),
-                'chunk_index': idx
+                'chunk_index': meta['chunk_index']
             }
             
             all_chunks.append(chunk_info)
         
-        logger.info(f"✅ Retrieved {len(all_chunks)} total chunks from {len(set(c['filename'] for c in all_chunks))} files")
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("✅ Retrieved %d total chunks from %d files", len(all_chunks), len({c['filename'] for c in all_chunks}))
         return all_chunks
     
     except Exception as e:
         logger.error(f"❌ Failed to retrieve all chunks: {e}")
         return []
 
+def encode_query(query: str) -> np.ndarray:
+    """Encode a query into a normalized (1, dim) float32 embedding."""
+    query_embedding = get_embedder().encode(
+        [query],
+        batch_size=1,
+        show_progress_bar=False,
+        convert_to_numpy=True,
+        normalize_embeddings=True
+    )
+    return np.ascontiguousarray(query_embedding, dtype=np.float32)
+
 def retrieve_relevant_chunks(
     query: str,
     chat_id: str,
     selected_files: Optional[List[str]] = None,
-    top_k: int = 5  # Increased for better context
+    top_k: int = 5,  # Increased for better context
+    query_embedding: Optional[np.ndarray] = None
 ) -> List[Dict[str, Any]]:
-    """Retrieve relevant chunks from FAISS with detailed semantic search."""
-    logger.info(f"🔍 Detailed Vector Search for query: '{query[:50]}...'")
+    """Retrieve relevant chunks from FAISS with detailed semantic search.
+
+    Pass a precomputed ``query_embedding`` (from encode_query) to skip
+    re-encoding the query.
+    """
+    logger.info("🔍 Detailed Vector Search for query: '%.50s...'", query)
     
     try:
-        embedder = get_embedder()
-        
-        logger.info("  📊 Encoding query with sentence transformer...")
-        query_embedding = embedder.encode([query], convert_to_numpy=True)[0]
-        query_embedding = np.array([query_embedding], dtype=np.float32)
-        faiss.normalize_L2(query_embedding)
-        logger.debug(f"  ✓ Query encoded - Dimension: {query_embedding.shape}")
+        if query_embedding is None:
+            logger.debug("  📊 Encoding query with sentence transformer...")
+            query_embedding = encode_query(query)
+        logger.debug("  ✓ Query encoded - Dimension: %s", query_embedding.shape)
         
         logger.info(f"  📂 Loading FAISS index for session {chat_id}...")
         index, metadata = load_faiss_index(chat_id)
@@ -536,23 +866,28 @@ def retrieve_relevant_chunks(
             logger.warning(f"  ⚠️ No index found for session {chat_id}")
             return []
         
-        logger.info(f"  🔎 Semantic search across {index.ntotal} vectors...")
+        logger.debug("  🔎 Semantic search across %d vectors...", index.ntotal)
         # Search for more candidates to filter and rank
         search_k = min(top_k * 3, index.ntotal)
-        distances, indices = index.search(query_embedding, search_k)
-        logger.debug(f"  ✓ Search complete - Found {len(indices[0])} candidates")
+        distances, indices = get_search_index(chat_id, index).search(query_embedding, search_k)
+        logger.debug("  ✓ Search complete - Found %d candidates", len(indices[0]))
+        
+        # Fetch metadata for the returned candidates only
+        candidate_meta = metadata.get_many(indices[0])
         
         # Collect and score chunks
+        debug_enabled = logger.isEnabledFor(logging.DEBUG)
         chunks = []
         for rank, (dist, idx) in enumerate(zip(distances[0], indices[0])):
-            if idx >= len(metadata):
-                logger.debug(f"    ⚠️ Index {idx} out of bounds")
+            meta = candidate_meta.get(int(idx))
+            if meta is None:
+                if debug_enabled:
+                    logger.debug("    ⚠️ Index %s has no metadata", idx)
                 continue
             
-            meta = metadata[idx]
-            
             if selected_files and meta['filename'] not in selected_files:
-                logger.debug(f"    ⏭️ Skipping {meta['filename']} (not selected)")
+                if debug_enabled:
+                    logger.debug("    ⏭️ Skipping %s (not selected)", meta['filename'])
                 continue
             
             # Calculate relevance score (0-100)
@@ -569,15 +904,17 @@ def retrieve_relevant_chunks(
             }
             
             chunks.append(chunk_info)
-            logger.debug(f"    [{rank+1}] File: {meta['filename'][:30]}... | Score: {relevance_score:.1f}%")
+            if debug_enabled:
+                logger.debug("    [%d] File: %s... | Score: %.1f%%", rank + 1, meta['filename'][:30], relevance_score)
         
         # Sort by similarity and limit to top_k
         chunks.sort(key=lambda x: x['similarity'], reverse=True)
         chunks = chunks[:top_k]
         
-        logger.info(f"✅ Retrieved {len(chunks)} most relevant chunks")
-        for i, chunk in enumerate(chunks, 1):
-            logger.info(f"   [{i}] {chunk['filename']} (Relevance: {chunk['relevance_score']:.1f}%)")
+        logger.info("✅ Retrieved %d most relevant chunks", len(chunks))
+        if debug_enabled:
+            for i, chunk in enumerate(chunks, 1):
+                logger.debug("   [%d] %s (Relevance: %.1f%%)", i, chunk['filename'], chunk['relevance_score'])
         
         return chunks
     
@@ -585,6 +922,191 @@ def retrieve_relevant_chunks(
         logger.error(f"❌ Failed to retrieve: {e}")
         return []
 
+# ============= OLLAMA CLIENT =============
+
+OLLAMA_GENERATE_URL = f"{OLLAMA_BASE_URL}/api/generate"
+
+try:
+    import h2  # noqa: F401 - enables httpx HTTP/2 support
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+_http_client: Optional[httpx.AsyncClient] = None
+
+def get_http_client() -> httpx.AsyncClient:
+    """Get the shared keep-alive HTTP client (also exposed as app.state.http).
+    
+    Every outbound call (Ollama generate, streaming, batches) goes through
+    this one pool. HTTP/2 is used when h2 is installed and the server
+    negotiates it; plain-http Ollama stays on keep-alive HTTP/1.1.
+    """
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = httpx.AsyncClient(
+            http2=HTTP2_AVAILABLE,
+            timeout=httpx.Timeout(OLLAMA_TIMEOUT, connect=2.0),
+            limits=httpx.Limits(max_connections=32, max_keepalive_connections=16)
+        )
+    return _http_client
+
+async def close_http_client():
+    """Close the shared HTTP client on shutdown."""
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+
+async def _post_generate(prompt: str) -> httpx.Response:
+    """Send one non-streaming generation to Ollama, bounded by OLLAMA_TIMEOUT."""
+    return await asyncio.wait_for(
+        get_http_client().post(
+            OLLAMA_GENERATE_URL,
+            json={
+                "model": OLLAMA_MODEL_NAME,
+                "prompt": prompt,
+                "stream": False,
+            }
+        ),
+        timeout=OLLAMA_TIMEOUT
+    )
+
+# Lower values are dispatched first
+PRIORITY_QUERY = 0
+PRIORITY_ANALYSIS = 1
+
+class OllamaBatcher:
+    """Micro-batches concurrent generation requests in front of Ollama.
+
+    Callers enqueue a prompt and await a future. A single worker collects
+    up to ``max_batch`` prompts (waiting at most ``window_ms`` after the
+    first) and starts each as its own task, with at most ``max_batch``
+    generations in flight; it goes straight back to collecting rather than
+    waiting for the batch to finish. The queue is priority-ordered so short
+    chat queries are admitted ahead of large multi-document analysis prompts.
+    """
+
+    def __init__(self, max_batch: int, window_ms: int):
+        self.max_batch = max_batch
+        self.window = window_ms / 1000
+        self._queue: Optional[asyncio.PriorityQueue] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._tasks: Set[asyncio.Task] = set()
+        self._seq = 0
+
+    @property
+    def running(self) -> bool:
+        return self._worker is not None and not self._worker.done()
+
+    def start(self) -> None:
+        self._queue = asyncio.PriorityQueue()
+        self._slots = asyncio.Semaphore(self.max_batch)
+        self._worker = asyncio.create_task(self._run())
+        logger.info(f"🧺 Ollama batcher started (max_batch={self.max_batch}, window={self.window * 1000:.0f}ms)")
+
+    async def stop(self) -> None:
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+        for task in list(self._tasks):
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    async def submit(self, prompt: str, priority: int = PRIORITY_QUERY) -> httpx.Response:
+        future = asyncio.get_running_loop().create_future()
+        # The sequence number keeps FIFO order within a priority
+        self._seq += 1
+        await self._queue.put((priority, self._seq, prompt, future))
+        return await future
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.window
+            while len(batch) < self.max_batch:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+
+            logger.debug("🧺 Dispatching Ollama batch of %d", len(batch))
+            for _, _, prompt, future in batch:
+                # Blocks only while max_batch generations are already running
+                await self._slots.acquire()
+                task = asyncio.create_task(self._dispatch(prompt, future))
+                self._tasks.add(task)
+                task.add_done_callback(self._tasks.discard)
+
+    async def _dispatch(self, prompt: str, future: asyncio.Future) -> None:
+        try:
+            result = await _post_generate(prompt)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            if not future.done():
+                future.set_exception(e)
+        else:
+            if not future.done():
+                future.set_result(result)
+        finally:
+            self._slots.release()
+
+ollama_batcher = OllamaBatcher(OLLAMA_BATCH_MAX_SIZE, OLLAMA_BATCH_WINDOW_MS)
+
+async def ollama_generate(prompt: str, priority: int = PRIORITY_QUERY) -> httpx.Response:
+    """
+    Run a non-streaming Ollama generation without blocking the event loop.
+    
+    Args:
+        prompt: Full prompt text
+        priority: PRIORITY_QUERY or PRIORITY_ANALYSIS
+    
+    Returns:
+        Raw Ollama response; raises asyncio.TimeoutError after OLLAMA_TIMEOUT seconds
+    """
+    if ollama_batcher.running:
+        return await ollama_batcher.submit(prompt, priority)
+    return await _post_generate(prompt)
+
+async def ollama_stream(prompt: str) -> AsyncIterator[str]:
+    """
+    Stream an Ollama generation token by token.
+    
+    Args:
+        prompt: Full prompt text
+    
+    Yields:
+        Response text deltas as Ollama produces them
+    """
+    async with get_http_client().stream(
+        "POST",
+        OLLAMA_GENERATE_URL,
+        json={
+            "model": OLLAMA_MODEL_NAME,
+            "prompt": prompt,
+            "stream": True,
+        }
+    ) as response:
+        response.raise_for_status()
+        async for line in response.aiter_lines():
+            if not line:
+                continue
+            data = json.loads(line)
+            if data.get("response"):
+                yield data["response"]
+            if data.get("done"):
+                break
+
 # ============= MODELS & SCHEMAS =============
 
 class UploadResponse(BaseModel):
@@ -614,9 +1136,19 @@ async def lifespan(app: FastAPI):
     logger.info("="*80)
     
     try:
+        faiss.omp_set_num_threads(FAISS_NUM_THREADS)
+        logger.info(f"🧵 FAISS threads: {FAISS_NUM_THREADS}")
+        
         logger.info("📚 Initializing embedder...")
         get_embedder()
         logger.info("✅ Embedder ready")
+        get_table_extractor()
+        # PDF extraction pool; its workers start on first use
+        get_process_pool()
+        # Summary token budgeting; may download, so keep it off the loop
+        await asyncio.to_thread(load_budget_tokenizer)
+        app.state.http = get_http_client()
+        ollama_batcher.start()
         logger.info("="*80)
         logger.info("✅ APP STARTUP COMPLETE")
         logger.info("="*80 + "\n")
@@ -627,11 +1159,31 @@ async def lifespan(app: FastAPI):
     
     yield
     
+    await ollama_batcher.stop()
+    shutdown_process_pool()
+    await close_http_client()
+    await sessions.close()
     logger.info("\n" + "="*80)
     logger.info("🛑 APP SHUTDOWN")
     logger.info("="*80)
 
-app = FastAPI(title="Document Analysis Chat", lifespan=lifespan)
+# orjson serializes response payloads (including numpy scalars) ~3x faster than json
+app = FastAPI(
+    title="Document Analysis Chat",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
+)
+
+class SelectiveGZipMiddleware(GZipMiddleware):
+    """GZip responses except server-sent event streams, which must flush per event."""
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["path"].endswith("/stream"):
+            await self.app(scope, receive, send)
+            return
+        await super().__call__(scope, receive, send)
+
+app.add_middleware(SelectiveGZipMiddleware, minimum_size=1024)
 
 # CORS Configuration
 app.add_middleware(
@@ -648,28 +1200,119 @@ app.add_middleware(
     expose_headers=["*"]
 )
 
-logger.info("✅ CORS middleware configured")
+logger.info("✅ CORS and GZip middleware configured")
 
 # ============= SUMMARY ROUTES INTEGRATION =============
 try:
-    from summary_routes import router as summary_router
+    from summary_routes import router as summary_router, llm_cache as summary_llm_cache
     app.include_router(summary_router)
+    # Share the loaded embedder for semantic LLM-cache lookups
+    summary_llm_cache.embed_fn = encode_query
     logger.info("✅ Summary routes integrated")
 except Exception as e:
     logger.warning(f"⚠️ Failed to integrate summary routes: {e}")
 
 # ============= ROUTES =============
 
+UPLOAD_BUFFER_SIZE = 1 << 20  # 1 MiB
+
+def save_upload_stream(src, dest_path: Path) -> int:
+    """Copy an upload's file object to disk block by block.
+
+    Peak memory stays at one buffer regardless of file size.
+
+    Returns:
+        Number of bytes written
+    """
+    total = 0
+    src.seek(0)
+    with open(dest_path, 'wb') as out:
+        while True:
+            block = src.read(UPLOAD_BUFFER_SIZE)
+            if not block:
+                break
+            out.write(block)
+            total += len(block)
+    return total
+
 @app.get("/api/health")
 async def health_check():
     """Health check endpoint."""
-    logger.info("❤️  Health check")
+    logger.debug("❤️  Health check")
     return {
         "status": "healthy",
         "timestamp": datetime.now().isoformat(),
         "embedding_dim": EMBEDDING_DIM
     }
 
+async def _process_upload(file: UploadFile, session_id: str) -> Dict[str, Any]:
+    """Save, extract, chunk and index a single uploaded file."""
+    logger.info("📤 UPLOAD REQUEST: %s", file.filename)
+    
+    # Generate a unique file_id; it also names the upload's staging file
+    file_id = str(uuid.uuid4())
+    # Uploads run concurrently, so same-named files in one request are
+    # written and indexed from their own staging file, then moved into place
+    staging_path = UPLOAD_DIR / f".{file_id}_{file.filename}.part"
+    
+    try:
+        logger.debug("  ✓ Size: %.2f MB, Session: %s", file.size / 1024 / 1024, session_id)
+        
+        # Validate file extension
+        ext = Path(file.filename).suffix.lower()
+        if ext not in ALLOWED_EXTENSIONS:
+            raise HTTPException(status_code=400, detail=f"File type {ext} not allowed. Only PDFs are supported.")
+        
+        # Validate file size
+        if file.size > MAX_FILE_SIZE:
+            raise HTTPException(status_code=400, detail=f"File {file.filename} is too large. Max size is {MAX_FILE_SIZE/1024/1024:.1f}MB")
+        
+        # Save file (streamed in fixed-size blocks off the event loop)
+        file_path = UPLOAD_DIR / file.filename
+        bytes_written = await asyncio.to_thread(save_upload_stream, file.file, staging_path)
+        
+        logger.debug("  ✓ Saved to %s (%d bytes)", staging_path, bytes_written)
+        
+        # Process the file (extract text, chunk, add to FAISS, etc.)
+        text, errors = await asyncio.to_thread(extract_text_from_pdf, staging_path)
+        if errors:
+            logger.warning("  ⚠️ Extraction warnings: %s", errors)
+        
+        if not text or len(text.strip()) < 50:
+            raise HTTPException(status_code=400, detail=f"Could not extract sufficient text from {file.filename}")
+        
+        # Chunk text and add to FAISS
+        chunks = await asyncio.to_thread(improved_semantic_text_chunking, text)
+        if not chunks:
+            raise HTTPException(status_code=400, detail=f"Could not create text chunks from {file.filename}")
+        
+        # The session index is read-modify-written, so appends are serialized
+        async with shared_resources.lock:
+            success = await asyncio.to_thread(add_to_faiss_index, file.filename, chunks, session_id)
+        if not success:
+            raise HTTPException(status_code=500, detail=f"Failed to index {file.filename}")
+        shared_resources.semantic_cache.invalidate_session(session_id)
+        
+        os.replace(staging_path, file_path)
+        
+        logger.info("✅ Successfully processed %s", file.filename)
+        
+        return {
+            "file_id": file_id,
+            "filename": file.filename,
+            "size": file.size,
+            "chunks": len(chunks),
+            "status": "success"
+        }
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"❌ Failed to process {file.filename}: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to process {file.filename}")
+    finally:
+        staging_path.unlink(missing_ok=True)
+
 @app.post("/api/upload")
 async def upload_files(
     files: List[UploadFile] = File(..., description="List of files to upload"),
@@ -678,88 +1321,41 @@ async def upload_files(
     """
     Upload and process documents.
     
+    Files are processed concurrently, at most MAX_CONCURRENT_FILE_TASKS at a time.
+    
     Args:
         files: List of files to upload (PDF only)
         session_id: The chat session ID to associate with these files
     """
-    uploaded_files = []
+    semaphore = asyncio.Semaphore(MAX_CONCURRENT_FILE_TASKS)
     
-    # Process each file
-    for file in files:
-        logger.info("\n" + "="*80)
-        logger.info(f"📤 UPLOAD REQUEST: {file.filename}")
-        logger.info("="*80)
-        
-        try:
-            logger.info(f"  ✓ File: {file.filename}")
-            logger.info(f"  ✓ Size: {file.size / 1024 / 1024:.2f} MB")
-            logger.info(f"  ✓ Session: {session_id}")
-            
-            # Validate file extension
-            ext = Path(file.filename).suffix.lower()
-            if ext not in ALLOWED_EXTENSIONS:
-                raise HTTPException(status_code=400, detail=f"File type {ext} not allowed. Only PDFs are supported.")
-            
-            # Validate file size
-            if file.size > MAX_FILE_SIZE:
-                raise HTTPException(status_code=400, detail=f"File {file.filename} is too large. Max size is {MAX_FILE_SIZE/1024/1024:.1f}MB")
-            
-            # Save file
-            file_path = UPLOAD_DIR / file.filename
-            content = await file.read()
-            with open(file_path, 'wb') as f:
-                f.write(content)
-            
-            logger.info(f"  ✓ Saved to {file_path}")
-            
-            # Process the file (extract text, chunk, add to FAISS, etc.)
-            text, errors = extract_text_from_pdf(file_path)
-            if errors:
-                logger.warning(f"  ⚠️ Extraction warnings: {errors}")
-            
-            if not text or len(text.strip()) < 50:
-                raise HTTPException(status_code=400, detail=f"Could not extract sufficient text from {file.filename}")
-            
-            # Chunk text and add to FAISS
-            chunks = improved_semantic_text_chunking(text)
-            if not chunks:
-                raise HTTPException(status_code=400, detail=f"Could not create text chunks from {file.filename}")
-            
-            success = add_to_faiss_index(file.filename, chunks, session_id)
-            if not success:
-                raise HTTPException(status_code=500, detail=f"Failed to index {file.filename}")
-            
-            # Generate a unique file_id based on filename
-            file_id = str(uuid.uuid4())
-            
-            uploaded_files.append({
-                "file_id": file_id,
-                "filename": file.filename,
-                "size": file.size,
-                "chunks": len(chunks),
-                "status": "success"
-            })
-            
-            logger.info(f"✅ Successfully processed {file.filename}")
-            
-        except HTTPException:
-            raise
-        except Exception as e:
-            logger.error(f"❌ Failed to process {file.filename}: {str(e)}")
-            raise HTTPException(status_code=500, detail=f"Failed to process {file.filename}")
+    async def _bounded(file: UploadFile) -> Dict[str, Any]:
+        async with semaphore:
+            return await _process_upload(file, session_id)
     
-    logger.info("="*80)
-    logger.info(f"✅ UPLOAD COMPLETE - Processed {len(uploaded_files)} files")
-    logger.info("="*80 + "\n")
+    results = await asyncio.gather(
+        *(_bounded(file) for file in files),
+        return_exceptions=True
+    )
+    
+    # Surface the first failure, as the sequential loop did
+    for result in results:
+        if isinstance(result, BaseException):
+            raise result
+    
+    uploaded_files = list(results)
+    
+    logger.info("✅ UPLOAD COMPLETE - Processed %d files", len(uploaded_files))
     
     # Also update the session with the uploaded files
-    if session_id in sessions:
-        for uploaded_file in uploaded_files:
-            sessions[session_id].files.append({
-                "file_id": uploaded_file["file_id"],
-                "filename": uploaded_file["filename"],
-                "selected": True
-            })
+    await sessions.add_files(session_id, [
+        {
+            "file_id": uploaded_file["file_id"],
+            "filename": uploaded_file["filename"],
+            "selected": True
+        }
+        for uploaded_file in uploaded_files
+    ])
     
     return {
         "status": "success",
@@ -768,49 +1364,64 @@ async def upload_files(
         "total_files": len(uploaded_files)
     }
 
+OLLAMA_ERROR_ANSWER = "Error generating response"
+OLLAMA_CONNECTION_ERROR_ANSWER = "Error connecting to model"
+
 @app.post("/api/query", response_model=QueryResponse)
 async def query_documents(request: QueryRequest):
     """Query documents using RAG."""
-    logger.info("\n" + "="*80)
-    logger.info(f"❓ QUERY: {request.query}")
-    logger.info("="*80)
+    return await answer_query(request)
+
+def build_query_prompt(
+    request: QueryRequest,
+    query_embedding: Optional[np.ndarray] = None
+) -> Tuple[Optional[str], List[Dict[str, Any]]]:
+    """
+    Retrieve context for a query and build the Ollama prompt.
     
-    try:
-        logger.info(f"  Chat: {request.chat_id}")
-        
-        # Retrieve with enhanced vector search (increased top_k for better context)
-        logger.info("🔍 Performing detailed vector search...")
-        chunks = retrieve_relevant_chunks(
-            request.query,
-            request.chat_id,
-            request.selected_files,
-            top_k=15  # Increased from 5 to 15 for more comprehensive context
+    Args:
+        request: Query, chat and file selection
+        query_embedding: Optional precomputed encode_query() result
+    
+    Returns:
+        (prompt, sources); prompt is None when no chunks were found
+    """
+    logger.debug("  Chat: %s", request.chat_id)
+    
+    # Retrieve with enhanced vector search (increased top_k for better context)
+    chunks = retrieve_relevant_chunks(
+        request.query,
+        request.chat_id,
+        request.selected_files,
+        top_k=15,  # Increased from 5 to 15 for more comprehensive context
+        query_embedding=query_embedding
+    )
+    
+    if not chunks:
+        logger.warning("  ⚠️ No chunks found")
+        return None, []
+    
+    # Build detailed context and the response sources in one pass
+    context_parts = []
+    sources = []
+    for i, chunk in enumerate(chunks, 1):
+        filename = chunk['filename']
+        relevance_score = chunk['relevance_score']
+        context_parts.append(
+            f"[Source {i}: {filename} - Relevance: {relevance_score:.1f}%]\n{chunk['content']}"
         )
-        
-        if not chunks:
-            logger.warning("  ⚠️ No chunks found")
-            return QueryResponse(
-                answer="No relevant information found.",
-                sources=[],
-                query=request.query
-            )
-        
-        logger.info(f"  ✓ Retrieved {len(chunks)} chunks")
-        
-        # Build detailed context with source information
-        logger.info("📝 Building detailed context with sources...")
-        context_parts = []
-        for i, chunk in enumerate(chunks, 1):
-            source_info = f"[Source {i}: {chunk['filename']} - Relevance: {chunk['relevance_score']:.1f}%]"
-            context_parts.append(f"{source_info}\n{chunk['content']}")
-        
-        context = "\n\n".join(context_parts)
-        logger.debug(f"  Context: {len(context)} chars from {len(chunks)} sources")
-        
-        # Query Ollama with enhanced prompt
-        logger.info("🤖 Querying Ollama with semantic understanding...")
-        
-        prompt = f"""You are an intelligent document analysis assistant. Based on the provided document context, answer the user's question in detail.
+        sources.append({
+            'filename': filename,
+            'similarity': chunk['similarity'],
+            'relevance_score': relevance_score,
+            'chunk_id': chunk['chunk_id'],
+            'preview': chunk['content_preview']
+        })
+    
+    context = "\n\n".join(context_parts)
+    logger.debug("  Context: %d chars from %d sources", len(context), len(chunks))
+    
+    prompt = f"""You are an intelligent document analysis assistant. Based on the provided document context, answer the user's question in detail.
 
 IMPORTANT INSTRUCTIONS:
 1. Provide a detailed and comprehensive answer
@@ -825,45 +1436,56 @@ DOCUMENT CONTEXT:
 USER QUESTION: {request.query}
 
 DETAILED ANSWER:"""
+    
+    return prompt, sources
+
+NO_RESULTS_ANSWER = "No relevant information found."
+
+async def answer_query(
+    request: QueryRequest,
+    query_embedding: Optional[np.ndarray] = None
+) -> QueryResponse:
+    """
+    Answer a query with retrieval + Ollama generation.
+    
+    Args:
+        request: Query, chat and file selection
+        query_embedding: Optional precomputed encode_query() result
+    
+    Returns:
+        QueryResponse with answer and sources
+    """
+    logger.info("❓ QUERY: %s", request.query)
+    
+    try:
+        prompt, sources = await asyncio.to_thread(build_query_prompt, request, query_embedding)
+        if prompt is None:
+            return QueryResponse(
+                answer=NO_RESULTS_ANSWER,
+                sources=[],
+                query=request.query
+            )
+        
+        # Query Ollama with enhanced prompt
+        logger.debug("🤖 Querying Ollama with semantic understanding...")
         
         try:
-            response = requests.post(
-                "http://localhost:11434/api/generate",
-                json={
-                    "model": "mistral",
-                    "prompt": prompt,
-                    "stream": False,
-                },
-                timeout=None  # No timeout at all
-            )
+            response = await ollama_generate(prompt)
             
             if response.status_code == 200:
                 answer = response.json()['response'].strip()
-                logger.info(f"  ✓ Answer: {len(answer)} chars")
+                logger.info("  ✓ Answer: %d chars", len(answer))
             else:
                 logger.error(f"  ❌ Ollama error: {response.status_code}")
-                answer = "Error generating response"
+                answer = OLLAMA_ERROR_ANSWER
         
         except Exception as e:
             logger.error(f"  ❌ Ollama failed: {e}")
-            answer = "Error connecting to model"
-        
-        logger.info("="*80)
-        logger.info(f"✅ QUERY COMPLETE")
-        logger.info("="*80 + "\n")
+            answer = OLLAMA_CONNECTION_ERROR_ANSWER
         
         return QueryResponse(
             answer=answer,
-            sources=[
-                {
-                    'filename': chunk['filename'],
-                    'similarity': chunk['similarity'],
-                    'relevance_score': chunk['relevance_score'],
-                    'chunk_id': chunk['chunk_id'],
-                    'preview': chunk['content_preview']
-                }
-                for chunk in chunks
-            ],
+            sources=sources,
             query=request.query
         )
     
@@ -873,13 +1495,8 @@ DETAILED ANSWER:"""
 
 # ============= CHAT SESSION MANAGEMENT =============
 
-class ChatSession(BaseModel):
-    session_id: str
-    created_at: datetime
-    messages: List[Dict] = []
-    files: List[Dict] = []
-
-sessions: Dict[str, ChatSession] = {}
+# In memory by default; Redis (REDIS_URL) lets several workers share sessions
+sessions = create_session_store(REDIS_URL, SESSION_TTL_SECONDS)
 
 @app.post("/api/chat/new")
 async def create_chat_session():
@@ -892,12 +1509,9 @@ async def create_chat_session():
             messages=[],
             files=[]
         )
-        sessions[session_id] = new_session
+        await sessions.create(new_session)
         
-        logger.info(f"\n" + "="*80)
-        logger.info(f"🆕 New chat session created: {session_id}")
-        logger.info(f"Total active sessions: {len(sessions)}")
-        logger.info("="*80)
+        logger.info("🆕 New chat session created: %s", session_id)
         
         return {
             "status": "success",
@@ -912,24 +1526,16 @@ async def create_chat_session():
 async def select_files(session_id: str, request: Request):
     """Update selected files for a chat session."""
     try:
-        logger.info("\n" + "="*80)
-        logger.info("📥 SELECT FILES REQUEST")
-        logger.info("="*80)
-        logger.info(f"Session ID: {session_id}")
-        logger.info(f"Available sessions: {list(sessions.keys())}")
-        logger.info(f"Total active sessions: {len(sessions)}")
-        
-        if session_id not in sessions:
-            logger.error(f"❌ Session not found: {session_id}")
-            logger.error(f"Available sessions: {list(sessions.keys())}")
-            logger.error(f"Total active sessions: {len(sessions)}")
+        logger.info("📥 SELECT FILES REQUEST: %s", session_id)
+        
+        if not await sessions.exists(session_id):
+            logger.error("❌ Session not found: %s", session_id)
             raise HTTPException(status_code=404, detail="Session not found")
         
         # Parse the request body
         try:
             body = await request.json()
-            logger.info(f"Request body type: {type(body)}")
-            logger.info(f"Request body content: {body}")
+            logger.debug("Request body: %r", body)
         except Exception as e:
             logger.error(f"❌ Failed to parse request body: {e}")
             raise HTTPException(status_code=400, detail="Invalid JSON in request body")
@@ -937,10 +1543,10 @@ async def select_files(session_id: str, request: Request):
         # Handle both formats: direct array or object with selected_files key
         if isinstance(body, list):
             selected_files = [fid for fid in body if fid is not None]  # Filter out None values
-            logger.info(f"Processed as direct list: {selected_files}")
+            logger.debug("Processed as direct list: %s", selected_files)
         elif isinstance(body, dict) and "selected_files" in body:
             selected_files = [fid for fid in body["selected_files"] if fid is not None]  # Filter out None values
-            logger.info(f"Processed from selected_files key: {selected_files}")
+            logger.debug("Processed from selected_files key: %s", selected_files)
         else:
             error_msg = f"Invalid request format. Expected list or dict with 'selected_files' key, got {type(body)}"
             logger.error(f"❌ {error_msg}")
@@ -948,14 +1554,13 @@ async def select_files(session_id: str, request: Request):
         
         # Log if we filtered out any None values
         if len(selected_files) != len(body if isinstance(body, list) else body.get("selected_files", [])):
-            logger.warning(f"⚠️ Filtered out None values from selected files")
+            logger.warning("⚠️ Filtered out None values from selected files")
         
         # Update the session's selected files - mark which files are selected
-        for file_record in sessions[session_id].files:
-            file_record["selected"] = file_record.get("file_id") in selected_files
+        if not await sessions.set_selected(session_id, selected_files):
+            raise HTTPException(status_code=404, detail="Session not found")
         
-        logger.info(f"📁 Updated selected files for session {session_id}: {selected_files}")
-        logger.info("="*80 + "\n")
+        logger.info("📁 Updated selected files for session %s: %s", session_id, selected_files)
         
         return {
             "status": "success",
@@ -968,6 +1573,45 @@ async def select_files(session_id: str, request: Request):
         logger.error(f"❌ Failed to update selected files: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+# Strong references keep fire-and-forget persistence tasks alive until they finish
+_background_tasks: Set[asyncio.Task] = set()
+
+async def _persist_turn(
+    session_id: str,
+    query: str,
+    answer: str,
+    sources: List[Dict[str, Any]]
+) -> None:
+    """Append a user/assistant exchange to the session history."""
+    timestamp = datetime.now().isoformat()
+    try:
+        await sessions.append_messages(session_id, [
+            {
+                "role": "user",
+                "content": query,
+                "timestamp": timestamp
+            },
+            {
+                "role": "assistant",
+                "content": answer,
+                "sources": sources,
+                "timestamp": timestamp
+            }
+        ])
+    except Exception as e:
+        logger.error(f"❌ Failed to persist chat turn for {session_id}: {e}")
+
+def schedule_persist_turn(
+    session_id: str,
+    query: str,
+    answer: str,
+    sources: List[Dict[str, Any]]
+) -> None:
+    """Persist a chat turn in the background so the response is not held up."""
+    task = asyncio.create_task(_persist_turn(session_id, query, answer, sources))
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+
 class ChatQueryRequest(BaseModel):
     query: str
     session_id: str
@@ -984,28 +1628,71 @@ SIMPLE_QUERIES = {
     "okay": "Got it! What would you like to do next?"
 }
 
-def get_simple_response(query: str) -> Optional[Dict]:
-    """Check if the query matches any simple patterns and return a response if found."""
-    query_lower = query.lower().strip()
+# Greetings that also match as the first word of a longer query ("hi there")
+SIMPLE_QUERY_PREFIXES = frozenset({"hi", "hello", "hey", "thanks", "thank you"})
+
+_TRIE_END = ""
+
+def _build_simple_query_trie() -> Dict[str, Any]:
+    """Build a character trie over SIMPLE_QUERIES keys; _TRIE_END marks a key."""
+    root: Dict[str, Any] = {}
+    for key in SIMPLE_QUERIES:
+        node = root
+        for ch in key:
+            node = node.setdefault(ch, {})
+        node[_TRIE_END] = key
+    return root
+
+_SIMPLE_QUERY_TRIE = _build_simple_query_trie()
+
+# Every match starts with some key, so one C-level startswith rejects most queries
+_SIMPLE_QUERY_STARTS = tuple(SIMPLE_QUERIES)
+
+def _match_simple_query(query_lower: str) -> Optional[str]:
+    """
+    Match a normalized query against SIMPLE_QUERIES in one anchored pass.
     
-    # Check for exact matches
-    if query_lower in SIMPLE_QUERIES:
-        return {
-            "answer": SIMPLE_QUERIES[query_lower],
-            "sources": [],
-            "query": query
-        }
+    Returns:
+        The matched key for an exact match, or for a greeting prefix
+        followed by a space; otherwise None
+    """
+    if not query_lower.startswith(_SIMPLE_QUERY_STARTS):
+        return None
     
-    # Check for queries that start with simple greetings
-    for prefix in ["hi ", "hello ", "hey ", "thanks ", "thank you "]:
-        if query_lower.startswith(prefix):
-            return {
-                "answer": SIMPLE_QUERIES[prefix.strip()],
-                "sources": [],
-                "query": query
-            }
+    node = _SIMPLE_QUERY_TRIE
+    for ch in query_lower:
+        if ch == " ":
+            key = node.get(_TRIE_END)
+            if key in SIMPLE_QUERY_PREFIXES:
+                return key
+        node = node.get(ch)
+        if node is None:
+            return None
+    return node.get(_TRIE_END)
+
+# Words that point back at earlier turns; such queries mean different things
+# at different points in a conversation, so they bypass the semantic cache
+FOLLOW_UP_WORDS = frozenset({
+    "it", "its", "this", "that", "these", "those", "they", "them", "their",
+    "he", "she", "him", "her", "his", "more", "previous", "above", "earlier",
+    "else", "again", "same"
+})
+
+def _is_follow_up(query: str) -> bool:
+    """True when a query refers back to the conversation."""
+    return any(word.strip(punctuation) in FOLLOW_UP_WORDS for word in query.lower().split())
+
+def get_simple_response(query: str) -> Optional[Dict]:
+    """Check if the query matches any simple patterns and return a response if found."""
+    key = _match_simple_query(query.lower().strip())
+    if key is None:
+        return None
     
-    return None
+    return {
+        "answer": SIMPLE_QUERIES[key],
+        "sources": [],
+        "query": query
+    }
 
 @app.post("/api/chat/query")
 async def chat_query(request: ChatQueryRequest):
@@ -1015,65 +1702,58 @@ async def chat_query(request: ChatQueryRequest):
     For simple queries (greetings, thanks), returns instant response (50-100ms).
     For complex queries, uses RAG with document context.
     """
-    start_time = datetime.now()
+    start_ns = time.perf_counter_ns()
     
     try:
-        logger.info(f"💬 Chat query: {request.query}")
-        logger.info(f"   Session: {request.session_id}")
-        logger.info(f"   Selected files: {request.selected_files}")
+        logger.info("💬 Chat query: %s", request.query)
+        logger.debug("   Session: %s, selected files: %s", request.session_id, request.selected_files)
         
         # Check for simple queries first (instant response)
         simple_response = get_simple_response(request.query)
         if simple_response:
-            response_time = (datetime.now() - start_time).total_seconds() * 1000
-            logger.info(f"⚡ Simple query handled in {response_time:.0f}ms")
+            response_time = (time.perf_counter_ns() - start_ns) / 1e6
+            logger.info("⚡ Simple query handled in %.0fms", response_time)
             
             # Log the interaction in session
-            if request.session_id in sessions:
-                sessions[request.session_id].messages.extend([
-                    {
-                        "role": "user",
-                        "content": request.query,
-                        "timestamp": datetime.now().isoformat()
-                    },
-                    {
-                        "role": "assistant",
-                        "content": simple_response["answer"],
-                        "sources": [],
-                        "timestamp": datetime.now().isoformat()
-                    }
-                ])
+            schedule_persist_turn(request.session_id, request.query, simple_response["answer"], [])
             
             return simple_response
         
-        # For non-simple queries, use RAG
-        logger.info("🔍 Processing with RAG...")
-        
-        # Use the existing query_documents function
-        response = await query_documents(QueryRequest(
-            query=request.query,
-            chat_id=request.session_id,
-            selected_files=request.selected_files
-        ))
+        # Paraphrases of an earlier standalone question in this session reuse its answer
+        query_embedding = await asyncio.to_thread(encode_query, request.query)
+        semantic_cache = shared_resources.semantic_cache
+        use_cache = not _is_follow_up(request.query)
+        response = (
+            semantic_cache.get(request.session_id, request.selected_files, query_embedding)
+            if use_cache else None
+        )
+        if response is not None:
+            logger.info("⚡ Semantic cache hit")
+            response = response.model_copy(update={"query": request.query})
+        else:
+            # For non-simple queries, use RAG
+            logger.debug("🔍 Processing with RAG...")
+            
+            response = await answer_query(
+                QueryRequest(
+                    query=request.query,
+                    chat_id=request.session_id,
+                    selected_files=request.selected_files
+                ),
+                query_embedding=query_embedding
+            )
+            if use_cache and response.sources and response.answer not in (
+                OLLAMA_ERROR_ANSWER, OLLAMA_CONNECTION_ERROR_ANSWER
+            ):
+                semantic_cache.set(
+                    request.session_id, request.selected_files, query_embedding, response
+                )
         
         # Log the interaction in session
-        if request.session_id in sessions:
-            sessions[request.session_id].messages.extend([
-                {
-                    "role": "user",
-                    "content": request.query,
-                    "timestamp": datetime.now().isoformat()
-                },
-                {
-                    "role": "assistant",
-                    "content": response.answer,
-                    "sources": response.sources,
-                    "timestamp": datetime.now().isoformat()
-                }
-            ])
-        
-        response_time = (datetime.now() - start_time).total_seconds() * 1000
-        logger.info(f"✅ Query processed in {response_time:.0f}ms")
+        schedule_persist_turn(request.session_id, request.query, response.answer, response.sources)
+        
+        response_time = (time.perf_counter_ns() - start_ns) / 1e6
+        logger.info("✅ Query processed in %.0fms", response_time)
         
         return response
         
@@ -1083,8 +1763,102 @@ async def chat_query(request: ChatQueryRequest):
         logger.error(f"❌ Chat query failed: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+def _sse_event(payload: Dict[str, Any]) -> str:
+    """Format one server-sent event frame."""
+    return f"data: {json.dumps(payload, default=str)}\n\n"
+
+@app.post("/api/chat/query/stream")
+async def chat_query_stream(request: ChatQueryRequest):
+    """
+    Stream a chat answer as server-sent events.
+    
+    Emits a {"sources": [...]} frame first, then {"token": ...} deltas as
+    Ollama generates, then {"done": true}. The full answer is appended to
+    the session once the stream completes.
+    """
+    logger.info("💬 Streaming chat query: %s", request.query)
+    
+    simple_response = get_simple_response(request.query)
+    if simple_response:
+        prompt, sources = None, []
+        fixed_answer = simple_response["answer"]
+    else:
+        try:
+            # Encode, search and metadata reads block; keep them off the event loop
+            prompt, sources = await asyncio.to_thread(build_query_prompt, QueryRequest(
+                query=request.query,
+                chat_id=request.session_id,
+                selected_files=request.selected_files
+            ))
+        except Exception as e:
+            logger.error(f"❌ Streaming query failed: {e}")
+            raise HTTPException(status_code=500, detail=str(e))
+        fixed_answer = NO_RESULTS_ANSWER
+    
+    async def event_stream() -> AsyncIterator[str]:
+        answer_parts: List[str] = []
+        try:
+            yield _sse_event({"sources": sources})
+            if prompt is None:
+                answer_parts.append(fixed_answer)
+                yield _sse_event({"token": fixed_answer})
+            else:
+                try:
+                    async for token in ollama_stream(prompt):
+                        answer_parts.append(token)
+                        yield _sse_event({"token": token})
+                except Exception as e:
+                    logger.error(f"  ❌ Ollama stream failed: {e}")
+                    yield _sse_event({"error": OLLAMA_CONNECTION_ERROR_ANSWER})
+            yield _sse_event({"done": True})
+        finally:
+            answer = "".join(answer_parts).strip()
+            if answer:
+                # Persist off the stream so a client disconnect cannot cancel it
+                schedule_persist_turn(request.session_id, request.query, answer, sources)
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 # ============= ENHANCED MULTI-DOCUMENT ANALYSIS =============
 
+# Fixed sections appended to the enhanced-analysis prompt
+TABLES_SECTION_TEMPLATE = Template("\n\n## EXTRACTED TABLES:\nFound $count tables in the document.")
+STRUCTURED_DATA_HEADER = "\n\n## STRUCTURED DATA FOUND:\n"
+STRUCTURED_DATA_LINE_TEMPLATE = Template("- $label: $values\n")
+
+def build_analysis_prompt(
+    base_prompt: str,
+    tables: List[Any],
+    structured_data: Dict[str, List[str]]
+) -> str:
+    """
+    Append table and structured-data sections to the analysis prompt.
+    
+    Sections are collected as parts and joined once instead of repeated
+    string concatenation.
+    """
+    parts = [base_prompt]
+    
+    # Add table information to prompt
+    if tables:
+        parts.append(TABLES_SECTION_TEMPLATE.substitute(count=len(tables)))
+    
+    # Add structured data to prompt
+    if any(structured_data.values()):
+        parts.append(STRUCTURED_DATA_HEADER)
+        for data_type, values in structured_data.items():
+            if values:
+                parts.append(STRUCTURED_DATA_LINE_TEMPLATE.substitute(
+                    label=data_type.replace('_', ' ').title(),
+                    values=', '.join(values[:5])
+                ))
+    
+    return "".join(parts)
+
 class EnhancedAnalysisRequest(BaseModel):
     session_id: str
     selected_file_ids: List[str]
@@ -1111,23 +1885,24 @@ async def enhanced_multi_document_analysis(request: EnhancedAnalysisRequest):
     - Source mapping
     """
     try:
-        logger.info("\n" + "="*80)
-        logger.info("🔬 ENHANCED MULTI-DOCUMENT ANALYSIS")
-        logger.info("="*80)
-        logger.info(f"Session: {request.session_id}")
-        logger.info(f"Files: {request.selected_file_ids}")
-        logger.info(f"Query: {request.query}")
-        logger.info(f"Analysis Type: {request.analysis_type}")
+        logger.info("🔬 ENHANCED MULTI-DOCUMENT ANALYSIS: %s", request.query)
+        logger.debug(
+            "Session: %s, files: %s, analysis type: %s",
+            request.session_id, request.selected_file_ids, request.analysis_type
+        )
         
         # Convert file_ids to filenames
-        filenames = get_filenames_from_file_ids(request.session_id, request.selected_file_ids)
+        filenames = await get_filenames_from_file_ids(request.session_id, request.selected_file_ids)
         if not filenames:
             raise HTTPException(status_code=400, detail="No valid files found")
         
-        # Retrieve chunks from all selected documents
-        logger.info("🔍 Retrieving document chunks...")
-        chunks = retrieve_relevant_chunks(
-            request.query or "Comprehensive analysis of all documents",
+        # Retrieve chunks from all selected documents; the query is encoded
+        # once and searched in a single call off the event loop
+        logger.debug("🔍 Retrieving document chunks...")
+        search_query = request.query or "Comprehensive analysis of all documents"
+        chunks = await asyncio.to_thread(
+            retrieve_relevant_chunks,
+            search_query,
             request.session_id,
             filenames,
             top_k=10
@@ -1136,51 +1911,35 @@ async def enhanced_multi_document_analysis(request: EnhancedAnalysisRequest):
         if not chunks:
             raise HTTPException(status_code=400, detail="No content found in documents")
         
-        # Initialize enhanced analyzer
-        analyzer = EnhancedDocumentAnalyzer(embedder=get_embedder())
-        
-        # Perform multi-document analysis
-        logger.info("📊 Performing multi-document analysis...")
-        analysis = analyzer.analyze_multiple_documents(
-            chunks,
-            query=request.query,
-            analysis_type=request.analysis_type
+        analyzer = get_document_analyzer()
+        table_extractor = get_table_extractor()
+        combined_content = "\n\n".join(chunk['content'] for chunk in chunks)
+        
+        # Multi-document analysis and table/structured-data extraction are
+        # independent, so run them concurrently off the event loop
+        logger.debug("📊 Performing multi-document analysis and extracting tables...")
+        analysis, tables, structured_data = await asyncio.gather(
+            asyncio.to_thread(
+                analyzer.analyze_multiple_documents,
+                chunks,
+                query=request.query,
+                analysis_type=request.analysis_type
+            ),
+            asyncio.to_thread(table_extractor.extract_tables_from_text, combined_content),
+            asyncio.to_thread(table_extractor.extract_structured_data, combined_content)
         )
         
-        # Extract tables from combined content
-        logger.info("📋 Extracting tables...")
-        table_extractor = TableExtractor()
-        combined_content = "\n\n".join([chunk['content'] for chunk in chunks])
-        tables = table_extractor.extract_tables_from_text(combined_content)
-        structured_data = table_extractor.extract_structured_data(combined_content)
-        
         # Create enhanced analysis prompt for LLM
-        logger.info("🤖 Generating comprehensive analysis with LLM...")
-        analysis_prompt = create_enhanced_analysis_prompt(analysis, request.query)
-        
-        # Add table information to prompt
-        if tables:
-            table_summary = f"Found {len(tables)} tables in the document."
-            analysis_prompt += f"\n\n## EXTRACTED TABLES:\n{table_summary}"
-        
-        # Add structured data to prompt
-        if any(structured_data.values()):
-            analysis_prompt += "\n\n## STRUCTURED DATA FOUND:\n"
-            for data_type, values in structured_data.items():
-                if values:
-                    analysis_prompt += f"- {data_type.replace('_', ' ').title()}: {', '.join(values[:5])}\n"
+        logger.debug("🤖 Generating comprehensive analysis with LLM...")
+        analysis_prompt = build_analysis_prompt(
+            create_enhanced_analysis_prompt(analysis, request.query),
+            tables,
+            structured_data
+        )
         
         # Query LLM for comprehensive analysis
         try:
-            llm_response = requests.post(
-                "http://localhost:11434/api/generate",
-                json={
-                    "model": "mistral",
-                    "prompt": analysis_prompt,
-                    "stream": False,
-                },
-                timeout=None
-            )
+            llm_response = await ollama_generate(analysis_prompt, priority=PRIORITY_ANALYSIS)
             
             if llm_response.status_code == 200:
                 comprehensive_analysis = llm_response.json()['response'].strip()
@@ -1190,9 +1949,7 @@ async def enhanced_multi_document_analysis(request: EnhancedAnalysisRequest):
             logger.error(f"LLM error: {e}")
             comprehensive_analysis = "Error connecting to analysis model"
         
-        logger.info("="*80)
         logger.info("✅ ENHANCED ANALYSIS COMPLETE")
-        logger.info("="*80 + "\n")
         
         return {
             "status": "success",
@@ -1230,5 +1987,8 @@ if __name__ == "__main__":
         app,
         host="0.0.0.0",
         port=8000,
-        reload=False  # Disable reload in production
+        reload=False,  # Disable reload in production
+        # Keep uvicorn's loggers on the root QueueHandler from setup_logging
+        # instead of its own synchronous stream handlers
+        log_config=None
     )
\ No newline at end of file
@@ -1,7 +1,9 @@
 from transformers import pipeline, AutoTokenizer, AutoModelForCausalLM
+from transformers.pytorch_utils import Conv1D
 import torch
 import logging
-from typing import Optional, Dict, Any
+from collections import OrderedDict
+from typing import Optional, Dict, Any, List, Tuple
 import os
 
 logger = logging.getLogger(__name__)
@@ -21,7 +23,10 @@ class HuggingFaceModel:
         self, 
         model_name: str = "distilgpt2",  # Default to smallest model
         use_gpu: bool = False,
-        max_memory_percent: float = 0.7  # Use max 70% of available RAM
+        max_memory_percent: float = 0.7,  # Use max 70% of available RAM
+        quantize: bool = True,
+        compile_model: bool = False,
+        kv_cache_sessions: int = 8
     ):
         """Initialize the HuggingFace model with CPU optimizations.
         
@@ -29,10 +34,16 @@ class HuggingFaceModel:
             model_name: Name or path of the pre-trained model
             use_gpu: Whether to use GPU if available (not recommended for your system)
             max_memory_percent: Maximum percentage of RAM to use
+            quantize: Apply int8 dynamic quantization to Linear (and GPT-2 Conv1D) layers
+            compile_model: Compile the forward pass with torch.compile (slow first call)
+            kv_cache_sessions: Number of sessions whose prompt KV cache is kept (LRU)
         """
         try:
             self.model_name = model_name
             self.use_gpu = False  # Force CPU for stability
+            # session_id -> (prompt token ids, past_key_values after prefill)
+            self._kv_cache: "OrderedDict[str, Tuple[torch.Tensor, Any]]" = OrderedDict()
+            self._kv_cache_sessions = kv_cache_sessions
             device = -1  # CPU device
             
             logger.info(f"Initializing model: {model_name}")
@@ -48,6 +59,7 @@ class HuggingFaceModel:
             os.environ["OMP_NUM_THREADS"] = "8"  # Use 8 CPU threads
             os.environ["OPENBLAS_NUM_THREADS"] = "8"
             os.environ["MKL_NUM_THREADS"] = "8"
+            torch.set_num_threads(8)
             
             # Load model with CPU optimizations
             self.pipe = pipeline(
@@ -62,6 +74,11 @@ class HuggingFaceModel:
                 }
             )
             
+            if quantize:
+                self._quantize_model()
+            if compile_model:
+                self._compile_model()
+            
             logger.info(f"✅ Model loaded successfully: {model_name}")
             logger.info(f"Model device: CPU")
             logger.info(f"Model size: ~{self._get_model_size()}")
@@ -70,6 +87,62 @@ class HuggingFaceModel:
             logger.error(f"❌ Error loading model: {e}")
             raise
 
+    @staticmethod
+    def _conv1d_to_linear(module: torch.nn.Module):
+        """Replace GPT-2 style Conv1D layers (y = xW + b) with equivalent nn.Linear."""
+        for name, child in module.named_children():
+            if isinstance(child, Conv1D):
+                in_features, out_features = child.weight.shape
+                linear = torch.nn.Linear(in_features, out_features)
+                linear.weight.data = child.weight.data.t().contiguous()
+                linear.bias.data = child.bias.data
+                setattr(module, name, linear)
+            else:
+                HuggingFaceModel._conv1d_to_linear(child)
+
+    def _quantize_model(self):
+        """Quantize Linear weights to int8 (halves bytes moved per decode step).
+        
+        GPT-2 family models (distilgpt2, gpt2-medium) implement attention and
+        MLP projections as Conv1D, so those are converted to Linear first.
+        An output head tied to the input embeddings is left in float32, since
+        quantizing it would untie it from the embedding matrix.
+        """
+        try:
+            model = self.pipe.model
+            self._conv1d_to_linear(model)
+            embedding_weight = model.get_input_embeddings().weight
+            qconfig = torch.ao.quantization.default_dynamic_qconfig
+            qconfig_spec = {
+                name: qconfig
+                for name, module in model.named_modules()
+                if isinstance(module, torch.nn.Linear) and module.weight is not embedding_weight
+            }
+            self.pipe.model = torch.ao.quantization.quantize_dynamic(
+                model, qconfig_spec, dtype=torch.qint8
+            )
+            logger.info(f"✅ Applied int8 dynamic quantization to {len(qconfig_spec)} layers")
+        except Exception as e:
+            logger.warning(f"⚠️ Quantization failed, keeping float32 weights: {e}")
+
+    def _compile_model(self):
+        """Compile the model forward with TorchInductor.
+        
+        The forward method is compiled rather than the module, because
+        generate() calls the module's own forward. torch.compile is lazy,
+        so a short warmup decode (prefill plus a cached step) triggers the
+        compilation here, where a failure can fall back to eager mode.
+        """
+        model = self.pipe.model
+        eager_forward = model.forward
+        try:
+            model.forward = torch.compile(eager_forward, dynamic=True)
+            self._decode("Hello", max_tokens=2, temperature=0.7, top_p=0.9)
+            logger.info("✅ Compiled model forward with torch.compile")
+        except Exception as e:
+            model.forward = eager_forward
+            logger.warning(f"⚠️ torch.compile unavailable, running eagerly: {e}")
+
     def _get_model_size(self) -> str:
         """Estimate model size in MB."""
         try:
@@ -79,12 +152,103 @@ class HuggingFaceModel:
         except:
             return "Unknown"
 
+    def _lookup_prefix(self, session_id: Optional[str], input_ids: torch.Tensor) -> Tuple[Any, torch.Tensor]:
+        """Find a cached prefill whose prompt is a strict prefix of input_ids.
+        
+        Returns:
+            (past_key_values or None, token ids still to be fed)
+        """
+        if session_id is None or session_id not in self._kv_cache:
+            return None, input_ids
+        
+        cached_ids, past = self._kv_cache[session_id]
+        prefix_len = cached_ids.shape[1]
+        if prefix_len < input_ids.shape[1] and torch.equal(input_ids[:, :prefix_len], cached_ids):
+            self._kv_cache.move_to_end(session_id)
+            logger.debug("Reusing %d cached prompt tokens for session %s", prefix_len, session_id)
+            return past, input_ids[:, prefix_len:]
+        return None, input_ids
+
+    def _store_prefix(self, session_id: Optional[str], input_ids: torch.Tensor, past: Any):
+        """Keep the prompt's KV cache for the session's next turn."""
+        # Legacy tuple caches are immutable; decoding builds new tensors each step
+        if session_id is None or not isinstance(past, tuple):
+            return
+        self._kv_cache[session_id] = (input_ids, past)
+        self._kv_cache.move_to_end(session_id)
+        while len(self._kv_cache) > self._kv_cache_sessions:
+            self._kv_cache.popitem(last=False)
+
+    @staticmethod
+    def _sample_next(
+        logits: torch.Tensor,
+        seen_ids: torch.Tensor,
+        temperature: float,
+        top_p: float,
+        top_k: int = 50,
+        repetition_penalty: float = 1.05
+    ) -> int:
+        """Sample one token id from the last-position logits (in place)."""
+        # Repetition penalty over prompt + generated tokens
+        scores = logits.gather(1, seen_ids)
+        scores = torch.where(scores < 0, scores * repetition_penalty, scores / repetition_penalty)
+        logits.scatter_(1, seen_ids, scores)
+        
+        logits.div_(temperature)
+        top_logits, top_indices = torch.topk(logits, min(top_k, logits.shape[-1]))
+        probs = torch.softmax(top_logits, dim=-1)
+        
+        # Nucleus: keep the smallest prefix of top-k whose mass reaches top_p
+        cumulative = probs.cumsum(dim=-1)
+        probs[cumulative - probs > top_p] = 0.0
+        choice = torch.multinomial(probs, 1)
+        return int(top_indices.gather(1, choice))
+
+    def _decode(
+        self,
+        prompt: str,
+        max_tokens: int,
+        temperature: float,
+        top_p: float,
+        session_id: Optional[str] = None
+    ) -> str:
+        """Prefill once, then feed only the last sampled token with the KV cache."""
+        model = self.pipe.model
+        tokenizer = self.pipe.tokenizer
+        eos_token_id = tokenizer.eos_token_id
+        
+        input_ids = tokenizer(prompt, return_tensors="pt").input_ids
+        generated: List[int] = []
+        
+        with torch.inference_mode():
+            past, feed_ids = self._lookup_prefix(session_id, input_ids)
+            outputs = model(input_ids=feed_ids, past_key_values=past, use_cache=True)
+            past = outputs.past_key_values
+            self._store_prefix(session_id, input_ids, past)
+            
+            seen_ids = input_ids
+            logits = outputs.logits[:, -1, :].float()
+            for _ in range(max_tokens):
+                next_id = self._sample_next(logits, seen_ids, temperature, top_p)
+                if next_id == eos_token_id:
+                    break
+                generated.append(next_id)
+                
+                next_input = torch.tensor([[next_id]], dtype=input_ids.dtype)
+                seen_ids = torch.cat([seen_ids, next_input], dim=1)
+                outputs = model(input_ids=next_input, past_key_values=past, use_cache=True)
+                past = outputs.past_key_values
+                logits = outputs.logits[:, -1, :].float()
+        
+        return tokenizer.decode(generated, skip_special_tokens=True).strip()
+
     def generate_text(
         self, 
         prompt: str, 
         max_tokens: int = 256,  # Reduced from 512
         temperature: float = 0.7,
-        top_p: float = 0.9
+        top_p: float = 0.9,
+        session_id: Optional[str] = None
     ) -> str:
         """Generate text with CPU optimizations and error recovery.
         
@@ -93,6 +257,8 @@ class HuggingFaceModel:
             max_tokens: Maximum number of tokens to generate (256-512 recommended)
             temperature: Controls randomness (lower = more deterministic)
             top_p: Nucleus sampling parameter
+            session_id: Optional chat session; follow-up turns whose prompt
+                extends the previous one skip re-prefilling the shared prefix
             
         Returns:
             Generated text or error message if generation fails
@@ -111,30 +277,8 @@ class HuggingFaceModel:
             
             logger.info(f"Generating text (max_tokens={max_tokens})...")
             
-            # Generate with aggressive optimization for CPU
-            outputs = self.pipe(
-                prompt,
-                max_new_tokens=max_tokens,
-                temperature=temperature,
-                top_p=top_p,
-                top_k=50,
-                do_sample=True,
-                repetition_penalty=1.05,
-                truncation=True,
-                num_beams=1,  # Disable beam search (too slow on CPU)
-                early_stopping=True,
-                pad_token_id=self.pipe.tokenizer.eos_token_id,
-                eos_token_id=self.pipe.tokenizer.eos_token_id,
-            )
-            
-            # Extract generated text
-            generated_text = outputs[0]["generated_text"]
-            
-            # Clean output - remove prompt
-            if prompt in generated_text:
-                answer = generated_text.split(prompt)[-1].strip()
-            else:
-                answer = generated_text.strip()
+            # Manual decode loop: only the newest token is fed after prefill
+            answer = self._decode(prompt, max_tokens, temperature, top_p, session_id)
             
             # Ensure answer is not empty
             if not answer:
@@ -157,7 +301,8 @@ class HuggingFaceModel:
         self, 
         question: str, 
         context: str = "",
-        max_tokens: int = 256
+        max_tokens: int = 256,
+        session_id: Optional[str] = None
     ) -> str:
         """Answer a question, optionally with context (optimized for CPU).
         
@@ -165,6 +310,7 @@ class HuggingFaceModel:
             question: The question to answer
             context: Optional context to base the answer on
             max_tokens: Maximum length of the answer
+            session_id: Optional chat session for KV cache reuse
             
         Returns:
             Answer to the question
@@ -192,7 +338,8 @@ Answer:"""
             return self.generate_text(
                 prompt, 
                 max_tokens=max_tokens,
-                temperature=0.6
+                temperature=0.6,
+                session_id=session_id
             )
             
         except Exception as e:
@@ -1,11 +1,29 @@
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import asyncio
 import json
 import logging
 import os
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Callable, List
+
+import httpx
 
 logger = logging.getLogger(__name__)
 
+# Fixed pieces of the answer_question prompt
+ANSWER_CONTEXT_PREFIX = "Context:\n"
+ANSWER_QUESTION_PREFIX = "\n\nQ: "
+ANSWER_DIRECT_PREFIX = "Q: "
+ANSWER_SUFFIX = "\n\nA:"
+
+# How long Ollama keeps the model resident after each request
+KEEP_ALIVE = "30m"
+
+# Default prompt cut for fast chat answers; callers that budget their own
+# prompts pass max_prompt_chars=None
+MAX_PROMPT_CHARS = 1000
+
 class OllamaModel:
     """Ultra-optimized Ollama model for fast responses on simple queries."""
     
@@ -27,6 +45,16 @@ class OllamaModel:
         self.timeout = timeout
         self.api_endpoint = f"{base_url}/api/generate"
         
+        # One pooled keep-alive session for every call to the server
+        self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=8,
+            pool_maxsize=32,
+            max_retries=Retry(total=2, backoff_factor=0.1)
+        )
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        
         logger.info("=" * 60)
         logger.info(f"🔄 Initializing Ollama Model: {model_name}")
         logger.info(f"📍 Server: {base_url}")
@@ -47,12 +75,23 @@ class OllamaModel:
             raise ConnectionError(error_msg)
         
         logger.info("✅ Connected to Ollama successfully!")
+        self._warmup()
+    
+    def close(self):
+        """Close pooled connections."""
+        self.session.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
     
     def _test_connection(self) -> bool:
         """Test if Ollama server is running."""
         try:
             logger.info("🔍 Testing Ollama connection...")
-            response = requests.get(
+            response = self.session.get(
                 f"{self.base_url}/api/tags",
                 timeout=5
             )
@@ -61,17 +100,36 @@ class OllamaModel:
             logger.error(f"❌ Connection error: {e}")
             return False
     
+    def _warmup(self):
+        """Load the model into memory now so the first query doesn't pay for it."""
+        try:
+            logger.info(f"🔥 Warming up {self.model_name}...")
+            # An empty prompt makes Ollama load the model without generating
+            response = self.session.post(
+                self.api_endpoint,
+                json={"model": self.model_name, "prompt": "", "stream": False, "keep_alive": KEEP_ALIVE},
+                timeout=120
+            )
+            if response.status_code == 200:
+                logger.info("✅ Model loaded")
+            else:
+                logger.warning(f"⚠️ Warmup returned {response.status_code}")
+        except Exception as e:
+            logger.warning(f"⚠️ Warmup failed: {e}")
+    
     def generate_text(
         self,
         prompt: str,
         max_tokens: int = 128,  # REDUCED from 256
         temperature: float = 0.5,  # REDUCED from 0.7 for faster generation
-        top_p: float = 0.8  # REDUCED from 0.9
+        top_p: float = 0.8,  # REDUCED from 0.9
+        stream_callback: Optional[Callable[[str], None]] = None,
+        max_prompt_chars: Optional[int] = MAX_PROMPT_CHARS
     ) -> str:
         """Generate text FAST using Ollama.
         
         Optimizations:
-        - Shorter prompts (max 1000 chars)
+        - Shorter prompts (max 1000 chars by default)
         - Fewer tokens (max 128)
         - Lower temperature (0.5)
         - Minimal parameters
@@ -81,6 +139,8 @@ class OllamaModel:
             max_tokens: Maximum tokens (128 for speed)
             temperature: Randomness (0.5 for fast)
             top_p: Nucleus sampling (0.8)
+            stream_callback: Optional callable invoked with each token as it arrives
+            max_prompt_chars: Prompt truncation length, or None to send it whole
             
         Returns:
             Generated text or error message
@@ -90,43 +150,25 @@ class OllamaModel:
             if not prompt or not isinstance(prompt, str):
                 return "Invalid prompt"
             
-            # FAST: Aggressive prompt truncation
-            if len(prompt) > 1000:
-                prompt = prompt[:1000]
-            
-            # FAST: Clamp parameters for speed
-            temperature = max(0.1, min(0.8, temperature))
-            max_tokens = min(max_tokens, 128)  # Max 128 tokens for speed
-            
             logger.info(f"🚀 FAST generation: {self.model_name}")
+            payload = self._build_payload(
+                prompt, max_tokens, temperature, top_p, stream=True, max_prompt_chars=max_prompt_chars
+            )
             
-            # FAST: Minimal payload
-            payload = {
-                "model": self.model_name,
-                "prompt": prompt,
-                "stream": False,
-                "temperature": temperature,
-                "num_predict": max_tokens,
-                "top_p": top_p,
-                "top_k": 20,  # REDUCED from 40
-                "repeat_penalty": 1.0,  # REDUCED from 1.1
-                "num_thread": 8
-            }
-            
-            # No timeout for API requests
-            response = requests.post(
+            # Stream tokens as they are generated; only the connect is time-bounded
+            response = self.session.post(
                 self.api_endpoint,
                 json=payload,
-                timeout=None  # No timeout at all
+                stream=True,
+                timeout=(5, None)
             )
             
-            if response.status_code != 200:
-                logger.error(f"❌ Error: {response.status_code}")
-                return "Error generating response"
-            
-            # FAST: Extract answer
-            result = response.json()
-            answer = result.get("response", "").strip()
+            with response:
+                if response.status_code != 200:
+                    logger.error(f"❌ Error: {response.status_code}")
+                    return "Error generating response"
+                
+                answer = self._accumulate_streaming_response(response, stream_callback)
             
             return answer if answer else "Unable to generate response"
             
@@ -141,11 +183,151 @@ class OllamaModel:
             return f"Error: {str(e)[:50]}"
     
     
+    def _build_payload(
+        self,
+        prompt: str,
+        max_tokens: int,
+        temperature: float,
+        top_p: float,
+        stream: bool,
+        max_prompt_chars: Optional[int] = MAX_PROMPT_CHARS
+    ) -> Dict[str, Any]:
+        """Clamp parameters and build the /api/generate payload."""
+        # FAST: Aggressive prompt truncation
+        if max_prompt_chars is not None and len(prompt) > max_prompt_chars:
+            prompt = prompt[:max_prompt_chars]
+        
+        # FAST: Clamp parameters for speed
+        temperature = max(0.1, min(0.8, temperature))
+        max_tokens = min(max_tokens, 128)  # Max 128 tokens for speed
+        
+        # FAST: Minimal payload
+        return {
+            "model": self.model_name,
+            "prompt": prompt,
+            "stream": stream,
+            "temperature": temperature,
+            "num_predict": max_tokens,
+            "top_p": top_p,
+            "top_k": 20,  # REDUCED from 40
+            "repeat_penalty": 1.0,  # REDUCED from 1.1
+            "num_thread": 8,
+            "keep_alive": KEEP_ALIVE
+        }
+    
+    async def _post_async(self, client: httpx.AsyncClient, payload: Dict[str, Any]) -> str:
+        """POST one non-streaming generation on a shared async client."""
+        try:
+            response = await client.post(self.api_endpoint, json=payload)
+            if response.status_code != 200:
+                logger.error(f"❌ Error: {response.status_code}")
+                return "Error generating response"
+            answer = response.json().get("response", "").strip()
+            return answer if answer else "Unable to generate response"
+        except httpx.TimeoutException:
+            logger.error("⏱️ Timeout - try simpler question")
+            return "Request timeout. Try a simpler question."
+        except httpx.ConnectError:
+            logger.error("❌ Cannot connect to Ollama")
+            return "Cannot connect to Ollama"
+        except Exception as e:
+            logger.error(f"❌ Error: {e}")
+            return f"Error: {str(e)[:50]}"
+    
+    def _async_client(self, concurrency: int) -> httpx.AsyncClient:
+        return httpx.AsyncClient(
+            timeout=httpx.Timeout(None, connect=5.0),
+            limits=httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+        )
+    
+    async def generate_text_async(
+        self,
+        prompt: str,
+        max_tokens: int = 128,
+        temperature: float = 0.5,
+        top_p: float = 0.8,
+        client: Optional[httpx.AsyncClient] = None
+    ) -> str:
+        """Async variant of generate_text (non-streaming).
+        
+        Args:
+            prompt: Input prompt
+            client: Optional shared AsyncClient; a temporary one is used otherwise
+            
+        Returns:
+            Generated text or error message
+        """
+        if not prompt or not isinstance(prompt, str):
+            return "Invalid prompt"
+        
+        payload = self._build_payload(prompt, max_tokens, temperature, top_p, stream=False)
+        if client is not None:
+            return await self._post_async(client, payload)
+        async with self._async_client(1) as own_client:
+            return await self._post_async(own_client, payload)
+    
+    async def agenerate_batch(
+        self,
+        prompts: List[str],
+        concurrency: int = 4,
+        max_tokens: int = 128,
+        temperature: float = 0.5,
+        top_p: float = 0.8
+    ) -> List[str]:
+        """Generate answers for many prompts concurrently.
+        
+        Ollama accepts parallel requests, so wall-clock time tracks the
+        slowest prompts per concurrency slot instead of the sum of all.
+        
+        Args:
+            prompts: Prompts to answer
+            concurrency: Maximum in-flight requests
+            
+        Returns:
+            Answers in prompt order
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+        
+        async with self._async_client(concurrency) as client:
+            async def run(prompt: str) -> str:
+                async with semaphore:
+                    return await self.generate_text_async(
+                        prompt, max_tokens, temperature, top_p, client=client
+                    )
+            
+            logger.info(f"🚀 Batch generation: {len(prompts)} prompts (concurrency={concurrency})")
+            return await asyncio.gather(*(run(prompt) for prompt in prompts))
+    
+    def generate_batch(self, prompts: List[str], concurrency: int = 4, **kwargs) -> List[str]:
+        """Synchronous wrapper around agenerate_batch for legacy callers."""
+        return asyncio.run(self.agenerate_batch(prompts, concurrency=concurrency, **kwargs))
+    
+    @staticmethod
+    def _accumulate_streaming_response(
+        response: requests.Response,
+        stream_callback: Optional[Callable[[str], None]] = None
+    ) -> str:
+        """Join the "response" fields of Ollama's newline-delimited JSON stream."""
+        parts = []
+        for line in response.iter_lines(decode_unicode=False):
+            if not line:
+                continue
+            chunk = json.loads(line)
+            token = chunk.get("response", "")
+            if token:
+                parts.append(token)
+                if stream_callback is not None:
+                    stream_callback(token)
+            if chunk.get("done"):
+                break
+        return "".join(parts).strip()
+    
     def answer_question(
         self,
         question: str,
         context: str = "",
-        max_tokens: int = 128  # REDUCED from 256
+        max_tokens: int = 128,  # REDUCED from 256
+        stream_callback: Optional[Callable[[str], None]] = None
     ) -> str:
         """Answer question FAST.
         
@@ -158,33 +340,30 @@ class OllamaModel:
             question: Question to answer
             context: Optional context (limited)
             max_tokens: Max response (128)
+            stream_callback: Optional callable invoked with each token
             
         Returns:
             Answer
         """
         try:
-            # FAST: Build minimal prompt
+            # FAST: Build minimal prompt from the fixed pieces in one join
             if context:
-                # FAST: Aggressive context limit
-                context = context[:800]  # REDUCED from 1500
-                prompt = f"""Context:
-{context}
-
-Q: {question}
-
-A:"""
+                # FAST: Aggressive context limit (REDUCED from 1500)
+                prompt = "".join((
+                    ANSWER_CONTEXT_PREFIX, context[:800],
+                    ANSWER_QUESTION_PREFIX, question, ANSWER_SUFFIX
+                ))
             else:
                 # FAST: Direct question
-                prompt = f"""Q: {question}
-
-A:"""
+                prompt = "".join((ANSWER_DIRECT_PREFIX, question, ANSWER_SUFFIX))
             
             logger.info(f"💬 FAST answer: {question[:30]}...")
             
             return self.generate_text(
                 prompt,
                 max_tokens=max_tokens,
-                temperature=0.5
+                temperature=0.5,
+                stream_callback=stream_callback
             )
             
         except Exception as e:
@@ -0,0 +1,176 @@
+"""
+PDF Ingest Pipeline
+Overlaps page extraction, chunking and embedding when indexing an upload
+into LangChainRAG
+"""
+
+import logging
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Tuple
+
+import fitz  # PyMuPDF
+import numpy as np
+from langchain_core.documents import Document
+
+from document_processor.chunker import SemanticChunker
+
+logger = logging.getLogger(__name__)
+
+# Chunks per embed_documents call
+EMBED_BATCH_SIZE = 64
+# Bounded queues give backpressure: a fast stage waits for a slow one
+QUEUE_MAXSIZE = 8
+# Stage queues poll this often so they notice a stopped pipeline
+POLL_SECONDS = 0.1
+
+_DONE = object()
+
+
+def _put(q: queue.Queue, item, stop: threading.Event) -> bool:
+    """Put unless the pipeline is stopped; returns False if it was."""
+    while not stop.is_set():
+        try:
+            q.put(item, timeout=POLL_SECONDS)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def _get(q: queue.Queue, stop: threading.Event):
+    """Get the next item, or _DONE once the pipeline is stopped."""
+    while not stop.is_set():
+        try:
+            return q.get(timeout=POLL_SECONDS)
+        except queue.Empty:
+            continue
+    return _DONE
+
+
+class IngestPipeline:
+    """Three-stage ingest: page text -> chunks -> batched embeddings.
+
+    The upload is saved first (PDF parsing needs the whole file). Then a
+    reader thread extracts page text, a chunker thread splits each page,
+    and the calling thread embeds chunks in batches as they arrive, so
+    parsing and chunking overlap with the model forward passes. The HNSW
+    index is built once at the end over all vectors, since its int8
+    quantizer is trained on the full set.
+    """
+
+    def __init__(self, file_manager, rag, chunker: Optional[SemanticChunker] = None):
+        """
+        Initialize the pipeline.
+
+        Args:
+            file_manager: FileManager the uploads are saved with
+            rag: LangChainRAG the vectorstores are added to
+            chunker: Chunker applied per page (default SemanticChunker())
+        """
+        self.file_manager = file_manager
+        self.rag = rag
+        self.chunker = chunker or SemanticChunker()
+        self._pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="ingest")
+
+    def ingest_pdf(self, src_stream, filename: str) -> str:
+        """
+        Save an uploaded PDF and index it.
+
+        Args:
+            src_stream: File-like object with the upload (e.g. UploadFile.file)
+            filename: Original filename
+
+        Returns:
+            file_id of the stored (possibly already known) file
+        """
+        file_id = self.file_manager.save_stream(src_stream, filename)
+        if file_id in self.rag.vector_stores or self.rag.load_vectorstore(file_id) is not None:
+            logger.info(f"Vector store already exists for {file_id}, skipping ingest")
+            return file_id
+
+        pdf_path = self.file_manager.get_file_path(file_id, filename)
+        page_queue: queue.Queue = queue.Queue(maxsize=QUEUE_MAXSIZE)
+        chunk_queue: queue.Queue = queue.Queue(maxsize=QUEUE_MAXSIZE)
+        stop = threading.Event()
+
+        reading = self._pool.submit(self._read_pages, pdf_path, page_queue, stop)
+        chunking = self._pool.submit(self._chunk_pages, page_queue, chunk_queue, stop)
+        try:
+            documents, vectors = self._embed_chunks(file_id, chunk_queue, stop)
+        finally:
+            stop.set()
+        # Re-raise a reader/chunker failure instead of indexing a partial file
+        reading.result()
+        chunking.result()
+
+        if not documents:
+            raise ValueError(f"No text chunks extracted from {filename}")
+        self.rag.add_vectorstore(file_id, documents, vectors)
+        return file_id
+
+    def _read_pages(self, pdf_path, page_queue: queue.Queue, stop: threading.Event):
+        """Stage 1: extract page text."""
+        try:
+            with fitz.open(pdf_path) as pdf:
+                for page in pdf:
+                    if not _put(page_queue, page.get_text(), stop):
+                        return
+        finally:
+            _put(page_queue, _DONE, stop)
+
+    def _chunk_pages(self, page_queue: queue.Queue, chunk_queue: queue.Queue, stop: threading.Event):
+        """Stage 2: split each page into chunks."""
+        try:
+            while True:
+                text = _get(page_queue, stop)
+                if text is _DONE:
+                    return
+                chunks = self.chunker.chunk_text(text)
+                if chunks and not _put(chunk_queue, chunks, stop):
+                    return
+        finally:
+            _put(chunk_queue, _DONE, stop)
+
+    def _embed_chunks(
+        self,
+        file_id: str,
+        chunk_queue: queue.Queue,
+        stop: threading.Event
+    ) -> Tuple[List[Document], np.ndarray]:
+        """Stage 3: embed chunks in batches as they arrive."""
+        documents: List[Document] = []
+        vectors: List[np.ndarray] = []
+        batch: List[str] = []
+
+        def flush():
+            vectors.append(np.asarray(self.rag.embeddings.embed_documents(batch), dtype=np.float32))
+            for text in batch:
+                index = len(documents)
+                documents.append(Document(
+                    page_content=text,
+                    metadata={"chunk_id": f"chunk_{index}", "file_id": file_id, "index": index}
+                ))
+            batch.clear()
+
+        while True:
+            chunks = _get(chunk_queue, stop)
+            if chunks is _DONE:
+                break
+            batch.extend(chunks)
+            while len(batch) >= EMBED_BATCH_SIZE:
+                overflow = batch[EMBED_BATCH_SIZE:]
+                del batch[EMBED_BATCH_SIZE:]
+                flush()
+                batch.extend(overflow)
+        if batch:
+            flush()
+
+        if not vectors:
+            return documents, np.empty((0, 0), dtype=np.float32)
+        return documents, np.vstack(vectors)
+
+    def close(self):
+        """Shut down the stage threads."""
+        self._pool.shutdown(wait=True)
@@ -1,22 +1,142 @@
 from langchain_community.document_loaders import PyPDFLoader
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain_community.vectorstores import FAISS
+from langchain_community.vectorstores.utils import DistanceStrategy
+from langchain_community.docstore.in_memory import InMemoryDocstore
 from langchain_community.embeddings import HuggingFaceEmbeddings
+from langchain_core.documents import Document
 from langchain.chains import RetrievalQA
+import faiss
+import numpy as np
+import torch
 import logging
+import pickle
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional
 
 logger = logging.getLogger(__name__)
 
+# HNSW graph parameters: neighbors per node, build-time and query-time beam width
+HNSW_M = 32
+HNSW_EF_CONSTRUCTION = 200
+HNSW_EF_SEARCH = 64
+
+# Merged vectorstores and retrievers kept for repeated file selections (LRU)
+MERGED_CACHE_MAX_ENTRIES = 16
+RETRIEVER_CACHE_MAX_ENTRIES = 32
+
 class LangChainRAG:
-    def __init__(self, embedder_model="BAAI/bge-base-en-v1.5"):
-        self.embeddings = HuggingFaceEmbeddings(model_name=embedder_model)
+    def __init__(
+        self,
+        embedder_model="BAAI/bge-base-en-v1.5",
+        quantize: bool = True,
+        persist_dir: Optional[str] = None
+    ):
+        # Unit-normalized embeddings, encoded 64 at a time, so search is inner product
+        self.embeddings = HuggingFaceEmbeddings(
+            model_name=embedder_model,
+            model_kwargs={"device": "cuda" if torch.cuda.is_available() else "cpu"},
+            encode_kwargs={"batch_size": 64, "normalize_embeddings": True, "convert_to_numpy": True}
+        )
         self.vector_stores = {}  # file_id -> vectorstore
+        self._merged_cache = OrderedDict()  # tuple(sorted(file_ids)) -> merged vectorstore
+        self._retriever_cache = OrderedDict()  # (file_ids key, search_kwargs) -> retriever
+        # Store vectors as int8 codes (4x smaller, faster distance kernels)
+        self.quantize = quantize
+        # Vectorstores are saved here so known files are loaded, not re-embedded
+        self.persist_dir = Path(persist_dir) if persist_dir else None
+        if self.persist_dir:
+            self.persist_dir.mkdir(parents=True, exist_ok=True)
+
+    def _build_index(self, vectors: np.ndarray) -> faiss.Index:
+        """Build an HNSW index (sub-linear search) over the vectors, int8 when quantizing"""
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        dim = vectors.shape[1]
+        if self.quantize:
+            index = faiss.IndexHNSWSQ(
+                dim, faiss.ScalarQuantizer.QT_8bit, HNSW_M, faiss.METRIC_INNER_PRODUCT
+            )
+        else:
+            index = faiss.IndexHNSWFlat(dim, HNSW_M, faiss.METRIC_INNER_PRODUCT)
+        index.hnsw.efConstruction = HNSW_EF_CONSTRUCTION
+        # SQ8 learns per-dimension ranges; a no-op for the flat storage
+        index.train(vectors)
+        index.add(vectors)
+        index.hnsw.efSearch = HNSW_EF_SEARCH
+        return index
+
+    def _build_vectorstore(self, documents: list, vectors: np.ndarray) -> FAISS:
+        """Wrap documents and their vectors in a FAISS vectorstore"""
+        return FAISS(
+            embedding_function=self.embeddings,
+            index=self._build_index(vectors),
+            docstore=InMemoryDocstore({str(i): doc for i, doc in enumerate(documents)}),
+            index_to_docstore_id={i: str(i) for i in range(len(documents))},
+            distance_strategy=DistanceStrategy.MAX_INNER_PRODUCT
+        )
+
+    def save_vectorstore(self, file_id: str):
+        """Write a file's vectorstore (index.faiss + index.pkl) under persist_dir"""
+        if self.persist_dir and file_id in self.vector_stores:
+            self.vector_stores[file_id].save_local(str(self.persist_dir / file_id))
+
+    def load_vectorstore(self, file_id: str) -> Optional[FAISS]:
+        """Load a previously saved vectorstore from persist_dir, if there is one"""
+        if not self.persist_dir:
+            return None
+        path = self.persist_dir / file_id
+        if not (path / "index.faiss").exists():
+            return None
+
+        # Same files FAISS.load_local reads, but let faiss mmap the index where supported
+        index = faiss.read_index(str(path / "index.faiss"), faiss.IO_FLAG_MMAP)
+        with open(path / "index.pkl", "rb") as f:
+            docstore, index_to_docstore_id = pickle.load(f)
+        vectorstore = FAISS(
+            embedding_function=self.embeddings,
+            index=index,
+            docstore=docstore,
+            index_to_docstore_id=index_to_docstore_id,
+            distance_strategy=DistanceStrategy.MAX_INNER_PRODUCT
+        )
+        self.vector_stores[file_id] = vectorstore
+        logger.info(f"Vector store loaded from disk for {file_id}")
+        return vectorstore
+
+    def _get_vectorstore(self, file_id: str) -> Optional[FAISS]:
+        """Return a file's vectorstore from memory, falling back to disk"""
+        vectorstore = self.vector_stores.get(file_id)
+        if vectorstore is None:
+            vectorstore = self.load_vectorstore(file_id)
+        return vectorstore
+
+    @staticmethod
+    def _documents_and_vectors(vectorstore: FAISS):
+        """Read back a vectorstore's documents and stored vectors in index order"""
+        ntotal = vectorstore.index.ntotal
+        documents = [
+            vectorstore.docstore.search(vectorstore.index_to_docstore_id[i])
+            for i in range(ntotal)
+        ]
+        return documents, vectorstore.index.reconstruct_n(0, ntotal)
+
+    def add_vectorstore(self, file_id: str, documents: list, vectors: np.ndarray) -> FAISS:
+        """Index already-embedded documents as the vectorstore for file_id"""
+        vectorstore = self._build_vectorstore(documents, vectors)
+        self.vector_stores[file_id] = vectorstore
+        self.save_vectorstore(file_id)
+        # Merged stores and retrievers that include this file are now stale
+        for key in [key for key in self._merged_cache if file_id in key]:
+            del self._merged_cache[key]
+        for key in [key for key in self._retriever_cache if file_id in key[0]]:
+            del self._retriever_cache[key]
+        logger.info(f"Vector store created for {file_id}")
+        return vectorstore
 
     def create_vectorstore(self, file_id: str, chunks: list):
         """Create vector store for document chunks"""
         try:
-            from langchain_core.documents import Document
-            
             # Convert chunks to LangChain documents
             documents = [
                 Document(
@@ -29,12 +149,13 @@ class LangChainRAG:
                 )
                 for chunk in chunks
             ]
-            
-            # Create FAISS vectorstore
-            vectorstore = FAISS.from_documents(documents, self.embeddings)
-            self.vector_stores[file_id] = vectorstore
-            logger.info(f"Vector store created for {file_id}")
-            return vectorstore
+
+            # Embed all chunks in one batched call, then index them directly
+            vectors = np.asarray(
+                self.embeddings.embed_documents([doc.page_content for doc in documents]),
+                dtype=np.float32
+            )
+            return self.add_vectorstore(file_id, documents, vectors)
         except Exception as e:
             logger.error(f"Error creating vectorstore: {e}")
             raise
@@ -44,25 +165,56 @@ class LangChainRAG:
         try:
             if not file_ids:
                 return None
-            
-            merged_store = self.vector_stores[file_ids[0]]
-            for file_id in file_ids[1:]:
-                if file_id in self.vector_stores:
-                    merged_store.merge_from(self.vector_stores[file_id])
-            
+
+            key = tuple(sorted(set(file_ids)))
+            if key in self._merged_cache:
+                self._merged_cache.move_to_end(key)
+                return self._merged_cache[key]
+
+            stores = [self._get_vectorstore(file_id) for file_id in key]
+            stores = [store for store in stores if store is not None]
+            if not stores:
+                return None
+            if len(stores) == 1:
+                return stores[0]
+
+            # HNSW indexes cannot merge_from, so build a new index over the union
+            documents, vectors = [], []
+            for store in stores:
+                store_documents, store_vectors = self._documents_and_vectors(store)
+                documents.extend(store_documents)
+                vectors.append(store_vectors)
+
+            merged_store = self._build_vectorstore(documents, np.vstack(vectors))
+            self._merged_cache[key] = merged_store
+            if len(self._merged_cache) > MERGED_CACHE_MAX_ENTRIES:
+                self._merged_cache.popitem(last=False)
             return merged_store
         except Exception as e:
             logger.error(f"Error merging vectorstores: {e}")
             raise
 
     def get_retriever(self, file_ids: list, search_kwargs: dict = None):
-        """Get retriever for specified files"""
+        """Get retriever for specified files; the same selection returns the same retriever"""
         try:
             if search_kwargs is None:
-                search_kwargs = {"k": 5}
-            
+                search_kwargs = {"k": 20}
+
+            try:
+                cache_key = (tuple(sorted(set(file_ids))), frozenset(search_kwargs.items()))
+            except TypeError:
+                cache_key = None  # unhashable search kwargs (e.g. a filter dict)
+            if cache_key in self._retriever_cache:
+                self._retriever_cache.move_to_end(cache_key)
+                return self._retriever_cache[cache_key]
+
             merged_store = self.merge_vectorstores(file_ids)
-            return merged_store.as_retriever(search_kwargs=search_kwargs)
+            retriever = merged_store.as_retriever(search_kwargs=search_kwargs)
+            if cache_key is not None:
+                self._retriever_cache[cache_key] = retriever
+                if len(self._retriever_cache) > RETRIEVER_CACHE_MAX_ENTRIES:
+                    self._retriever_cache.popitem(last=False)
+            return retriever
         except Exception as e:
             logger.error(f"Error getting retriever: {e}")
-            raise
\ No newline at end of file
+            raise
@@ -1,45 +1,61 @@
-from langchain.chains import RetrievalQA
-from langchain_core.prompts import PromptTemplate
 import logging
+from collections import OrderedDict
 
 logger = logging.getLogger(__name__)
 
+# Retrieve a wide candidate set, then keep the best few after reranking
+RETRIEVE_K = 20
+RERANK_TOP_K = 5
+
+# Chains kept for recently used retrievers (LRU)
+CHAIN_CACHE_MAX_ENTRIES = 32
+
 class QAChain:
     def __init__(self, llm, reranker):
         self.llm = llm
         self.reranker = reranker
+        # id(retriever) -> (retriever, chain); holding the retriever keeps its id from being reused.
+        # LangChainRAG.get_retriever returns the same retriever for the same files, so this hits.
+        self._chain_cache = OrderedDict()
 
     def create_qa_chain(self, retriever):
-        """Create QA chain with retriever and LLM"""
+        """Create a retrieve -> rerank -> answer callable for the retriever"""
+        cached = self._chain_cache.get(id(retriever))
+        if cached is not None and cached[0] is retriever:
+            self._chain_cache.move_to_end(id(retriever))
+            return cached[1]
+
         try:
-            prompt_template = """Use the following pieces of context to answer the question. 
-            If you don't know the answer, say so.
-
-Context:
-{context}
-
-Question: {question}
-
-Answer:"""
-            
-            PROMPT = PromptTemplate(
-                template=prompt_template,
-                input_variables=["context", "question"]
-            )
-            
-            qa_chain = RetrievalQA.from_chain_type(
-                llm=self.llm,
-                chain_type="stuff",
-                retriever=retriever,
-                return_source_documents=True,
-                chain_type_kwargs={"prompt": PROMPT}
-            )
-            
+            def qa_chain(inputs: dict) -> dict:
+                query = inputs["query"]
+                documents = retriever.invoke(query)
+                if self.reranker is not None:
+                    # One batched cross-encoder pass over all candidates
+                    documents = self.reranker.rerank_passages(query, documents, top_k=RERANK_TOP_K)
+                else:
+                    documents = documents[:RERANK_TOP_K]
+
+                context = "\n\n".join(doc.page_content for doc in documents)
+                return {
+                    "result": self.llm.answer_question(query, context),
+                    "source_documents": documents
+                }
+
+            self._chain_cache[id(retriever)] = (retriever, qa_chain)
+            if len(self._chain_cache) > CHAIN_CACHE_MAX_ENTRIES:
+                self._chain_cache.popitem(last=False)
             return qa_chain
         except Exception as e:
             logger.error(f"Error creating QA chain: {e}")
             raise
 
+    def invalidate(self, retriever=None):
+        """Drop the cached chain for a retriever (or all chains) after its vectorstore changes"""
+        if retriever is None:
+            self._chain_cache.clear()
+        else:
+            self._chain_cache.pop(id(retriever), None)
+
     def answer_query(self, qa_chain, query: str) -> dict:
         """Answer query using QA chain"""
         try:
@@ -50,4 +66,4 @@ Answer:"""
             }
         except Exception as e:
             logger.error(f"Error answering query: {e}")
-            raise
\ No newline at end of file
+            raise
@@ -1,9 +1,71 @@
 from sentence_transformers import CrossEncoder
+import numpy as np
+import torch
+from langchain_core.documents import Document
 import logging
-from typing import List, Union, Dict, Any, Optional
+import queue
+import threading
+from concurrent.futures import Future
+from typing import List, Union, Dict, Any, Optional, Tuple
 
 logger = logging.getLogger(__name__)
 
+class RerankerService:
+    """Micro-batches cross-encoder scoring across concurrent callers.
+    
+    Callers enqueue (query, passage) pairs with a Future each. A background
+    thread collects up to ``max_batch`` pairs, waiting at most ``wait_ms``
+    after the first, scores them in one ``predict`` call and resolves the
+    futures, so concurrent queries share forward passes.
+    """
+    
+    def __init__(self, model: CrossEncoder, max_batch: int = 32, wait_ms: float = 10.0):
+        self.model = model
+        self.max_batch = max_batch
+        self.wait = wait_ms / 1000
+        self._queue: "queue.Queue[Tuple[str, str, Future]]" = queue.Queue()
+        self._worker = threading.Thread(target=self._run, name="reranker-batcher", daemon=True)
+        self._worker.start()
+    
+    def submit(self, query: str, passage: str) -> Future:
+        """Queue one pair for scoring."""
+        future: Future = Future()
+        self._queue.put((query, passage, future))
+        return future
+    
+    def score(self, query: str, passages: List[str]) -> List[float]:
+        """Score passages against a query, blocking until their batch runs."""
+        futures = [self.submit(query, passage) for passage in passages]
+        return [future.result() for future in futures]
+    
+    def _collect(self) -> List[Tuple[str, str, Future]]:
+        batch = [self._queue.get()]
+        while len(batch) < self.max_batch:
+            try:
+                batch.append(self._queue.get(timeout=self.wait))
+            except queue.Empty:
+                break
+        return batch
+    
+    def _run(self):
+        while True:
+            batch = self._collect()
+            try:
+                # inference_mode is thread-local, so it has to wrap the call here
+                with torch.inference_mode():
+                    scores = self.model.predict(
+                        [[query, passage] for query, passage, _ in batch],
+                        batch_size=self.max_batch,
+                        convert_to_numpy=True,
+                        show_progress_bar=False
+                    )
+                for (_, _, future), score in zip(batch, scores):
+                    future.set_result(float(score))
+            except Exception as e:
+                for _, _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+
 class Reranker:
     def __init__(self, model_name: str = "cross-encoder/ms-marco-MiniLM-L-12-v2"):
         """Initialize the reranker with a cross-encoder model.
@@ -13,10 +75,24 @@ class Reranker:
         """
         try:
             self.model = CrossEncoder(model_name, max_length=512)
+            if torch.cuda.is_available():
+                # fp16 weights: half the memory traffic, tensor-core matmuls
+                self.model.model.half()
+            self.service = RerankerService(self.model)
             logger.info(f"Loaded reranker model: {model_name}")
         except Exception as e:
             logger.warning(f"Could not load cross-encoder '{model_name}': {e}")
             self.model = None
+            self.service = None
+
+    @staticmethod
+    def _passage_text(passage: Union[Dict[str, Any], str, object]) -> str:
+        """Text of one passage of any supported type."""
+        if hasattr(passage, 'page_content'):  # Document object
+            return passage.page_content
+        if isinstance(passage, dict):  # Dictionary
+            return passage.get('page_content', passage.get('content', str(passage)))
+        return str(passage)  # String or other
 
     def rerank_passages(
         self, 
@@ -41,58 +117,40 @@ class Reranker:
             return passages[:top_k]
         
         try:
-            # Extract passage texts while preserving original format
-            passage_data = []
-            for i, passage in enumerate(passages):
-                if hasattr(passage, 'page_content'):  # Document object
-                    passage_data.append({
-                        'original': passage,
-                        'text': passage.page_content,
-                        'type': 'document',
-                        'metadata': getattr(passage, 'metadata', {})
-                    })
-                elif isinstance(passage, dict):  # Dictionary
-                    passage_data.append({
-                        'original': passage,
-                        'text': passage.get('page_content', passage.get('content', str(passage))),
-                        'type': 'dict',
-                        'metadata': passage.get('metadata', {})
-                    })
-                else:  # String or other
-                    passage_data.append({
-                        'original': passage,
-                        'text': str(passage),
-                        'type': 'string',
-                        'metadata': {}
-                    })
-            
-            # Skip reranking if no valid passages
-            if not passage_data:
-                return passages[:top_k]
+            # Detect the passage type once; RAG feeds homogeneous lists
+            kind = type(passages[0])
+            homogeneous = all(type(passage) is kind for passage in passages)
+            if homogeneous and kind is Document:
+                texts = [passage.page_content for passage in passages]
+            elif homogeneous and kind is str:
+                texts = passages
+            else:
+                texts = [self._passage_text(passage) for passage in passages]
             
-            # Create query-passage pairs for reranking
-            pairs = [[query, item['text']] for item in passage_data]
+            # Score through the shared micro-batcher
+            scores = np.asarray(self.service.score(query, texts))
             
-            # Get scores from cross-encoder
-            scores = self.model.predict(pairs)
+            # Select the top_k in O(N), then order just those (highest first)
+            k = min(top_k, len(scores))
+            top = np.argpartition(-scores, k - 1)[:k] if k < len(scores) else np.arange(k)
+            top = top[np.argsort(-scores[top], kind='stable')]
             
-            # Sort passages by score (highest first)
-            scored_passages = list(zip(passage_data, scores))
-            scored_passages.sort(key=lambda x: x[1], reverse=True)
+            # Convert back to original format (documents are returned as fresh copies)
+            if homogeneous and kind is Document:
+                return [
+                    Document(page_content=passages[i].page_content, metadata=passages[i].metadata)
+                    for i in top
+                ]
+            if homogeneous and kind is str:
+                return [passages[i] for i in top]
             
-            # Convert back to original format
             results = []
-            for item, _ in scored_passages[:top_k]:
-                if item['type'] == 'document':
-                    # Return document object
-                    from langchain_core.documents import Document
-                    results.append(Document(
-                        page_content=item['original'].page_content,
-                        metadata=item['original'].metadata
-                    ))
+            for i in top:
+                passage = passages[i]
+                if hasattr(passage, 'page_content'):
+                    results.append(Document(page_content=passage.page_content, metadata=passage.metadata))
                 else:
-                    # Return original object
-                    results.append(item['original'])
+                    results.append(passage)
             
             return results
             
@@ -3,12 +3,15 @@ Session Management Module
 Handles persistent storage and recovery of chat sessions
 """
 
-import json
 import logging
-from pathlib import Path
+import os
+import time
 from datetime import datetime
+from pathlib import Path
 from typing import Dict, List, Optional, Any
 
+import orjson
+
 logger = logging.getLogger(__name__)
 
 class SessionManager:
@@ -28,8 +31,11 @@ class SessionManager:
             # Add timestamp
             session_data['last_updated'] = datetime.now().isoformat()
             
-            with open(session_file, 'w') as f:
-                json.dump(session_data, f, indent=2)
+            # Write a temp file and rename it over the target so a crash never leaves a truncated session
+            data = orjson.dumps(session_data, option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY)
+            tmp_file = session_file.with_suffix('.tmp')
+            tmp_file.write_bytes(data)
+            os.replace(tmp_file, session_file)
             
             logger.info(f"✅ Session {session_id} saved")
             return True
@@ -46,8 +52,7 @@ class SessionManager:
                 logger.warning(f"⚠️ Session {session_id} not found")
                 return None
             
-            with open(session_file, 'r') as f:
-                session_data = json.load(f)
+            session_data = orjson.loads(session_file.read_bytes())
             
             logger.info(f"✅ Session {session_id} loaded")
             return session_data
@@ -81,20 +86,16 @@ class SessionManager:
     def cleanup_old_sessions(self, days: int = 7) -> int:
         """Delete sessions older than specified days."""
         try:
-            from datetime import timedelta
-            cutoff_time = datetime.now() - timedelta(days=days)
+            # Every save rewrites the file, so its mtime tracks last_updated: stat, don't parse
+            cutoff_time = time.time() - days * 86400
             deleted_count = 0
             
             for session_file in self.sessions_dir.glob("*.json"):
                 try:
-                    with open(session_file, 'r') as f:
-                        session_data = json.load(f)
-                    
-                    last_updated = datetime.fromisoformat(session_data.get('last_updated', ''))
-                    if last_updated < cutoff_time:
+                    if session_file.stat().st_mtime < cutoff_time:
                         session_file.unlink()
                         deleted_count += 1
-                except:
+                except OSError:
                     pass
             
             logger.info(f"✅ Cleaned up {deleted_count} old sessions")
@@ -1,3 +1,6 @@
+import hashlib
+import io
+import os
 import shutil
 from pathlib import Path
 import uuid
@@ -5,26 +8,64 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+# Copy uploads in 1 MiB blocks so peak memory doesn't grow with file size
+COPY_BUFFER_SIZE = 1 << 20
+
 class FileManager:
     def __init__(self, upload_dir: Path):
         self.upload_dir = upload_dir
         self.upload_dir.mkdir(exist_ok=True)
 
     def save_file(self, file_content, filename: str) -> str:
-        """Save uploaded file and return file_id"""
+        """Save uploaded bytes and return file_id"""
+        return self.save_stream(io.BytesIO(file_content), filename)
+
+    def save_stream(self, src_fileobj, filename: str) -> str:
+        """Save an uploaded file-like object (e.g. UploadFile.file) and return file_id
+
+        The file_id is a hash of the content, so re-uploading the same file
+        returns the existing id and downstream embedding can be skipped.
+        """
+        tmp_dir = self.upload_dir / f".tmp-{uuid.uuid4().hex}"
         try:
-            file_id = str(uuid.uuid4())
-            file_path = self.upload_dir / file_id / filename
-            file_path.parent.mkdir(exist_ok=True)
+            tmp_dir.mkdir()
+            tmp_path = tmp_dir / filename
             
-            with open(file_path, 'wb') as f:
-                f.write(file_content)
+            with open(tmp_path, 'wb', buffering=COPY_BUFFER_SIZE) as dst:
+                file_id = self._copy(src_fileobj, dst)
+            
+            file_dir = self.upload_dir / file_id
+            try:
+                os.rename(tmp_dir, file_dir)
+            except OSError:
+                # Same content already stored; keep it, adding this filename if new
+                if not file_dir.is_dir():
+                    raise
+                if not (file_dir / filename).exists():
+                    os.replace(tmp_path, file_dir / filename)
+                logger.info(f"File already stored: {file_id}/{filename}")
+                return file_id
             
             logger.info(f"File saved: {file_id}/{filename}")
             return file_id
         except Exception as e:
             logger.error(f"Error saving file: {e}")
             raise
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    @staticmethod
+    def _copy(src, dst) -> str:
+        """Copy src into dst block by block, hashing in the same pass
+
+        Returns:
+            Hex BLAKE2b-128 digest of the copied content
+        """
+        hasher = hashlib.blake2b(digest_size=16)
+        while chunk := src.read(COPY_BUFFER_SIZE):
+            hasher.update(chunk)
+            dst.write(chunk)
+        return hasher.hexdigest()
 
     def get_file_path(self, file_id: str, filename: str) -> Path:
         """Get path to saved file"""
@@ -0,0 +1,218 @@
+"""
+Chunk Metadata Store
+SQLite-backed per-chat chunk metadata keyed by FAISS row id, with chunk
+text kept in an append-only blob file
+"""
+
+import logging
+import mmap
+import sqlite3
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS chunks (
+    idx INTEGER PRIMARY KEY,
+    chunk_id TEXT NOT NULL,
+    filename TEXT NOT NULL,
+    chat_id TEXT NOT NULL,
+    content_offset INTEGER NOT NULL,
+    content_length INTEGER NOT NULL,
+    timestamp TEXT,
+    page TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_chunks_filename ON chunks(filename);
+"""
+
+_COLUMNS = (
+    "idx", "chunk_id", "filename", "chat_id",
+    "content_offset", "content_length", "timestamp", "page"
+)
+
+# SQLite's default SQLITE_MAX_VARIABLE_NUMBER is 999 on older builds
+_MAX_PARAMS = 900
+
+
+class ChunkMetadataStore:
+    """Chunk metadata for one chat session, stored as rows keyed by FAISS index.
+
+    Lookups touch only the requested rows instead of deserializing the
+    whole metadata list, so retrieval cost no longer grows with corpus size.
+    Full chunk text lives in a separate append-only file; rows only record
+    its (offset, length), and reads slice a shared read-only mmap.
+    """
+
+    def __init__(self, db_path: Path, content_path: Path):
+        """
+        Initialize the store, creating the database if needed.
+
+        Args:
+            db_path: Path of the SQLite file for this chat
+            content_path: Path of the append-only chunk text file
+        """
+        self.db_path = Path(db_path)
+        self.content_path = Path(content_path)
+        self._content_map: Optional[mmap.mmap] = None
+        self._content_lock = threading.Lock()
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        """Release the content file mmap; the store reopens it on the next read."""
+        with self._content_lock:
+            if self._content_map is not None:
+                self._content_map.close()
+                self._content_map = None
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """Open a short-lived connection that commits on success."""
+        conn = sqlite3.connect(str(self.db_path))
+        try:
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _write_contents(self, texts: Iterable[str]) -> List[Tuple[int, int]]:
+        """Append chunk texts to the content file and return their spans."""
+        spans = []
+        with open(self.content_path, "ab") as f:
+            offset = f.tell()
+            for text in texts:
+                data = text.encode("utf-8")
+                f.write(data)
+                spans.append((offset, len(data)))
+                offset += len(data)
+        return spans
+
+    def _read_content(self, offset: int, length: int) -> str:
+        """Slice one chunk's text out of the content file mmap."""
+        end = offset + length
+        if end == 0:
+            return ""
+        with self._content_lock:
+            # Remap when the file has grown past the current mapping
+            if self._content_map is None or len(self._content_map) < end:
+                if self._content_map is not None:
+                    self._content_map.close()
+                with open(self.content_path, "rb") as f:
+                    self._content_map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            return self._content_map[offset:end].decode("utf-8")
+
+    def _to_dict(self, row: sqlite3.Row) -> Dict[str, Any]:
+        meta = dict(row)
+        meta["chunk_index"] = meta.pop("idx")
+        meta["content"] = self._read_content(
+            meta.pop("content_offset"), meta.pop("content_length")
+        )
+        if meta.get("page") is None:
+            meta.pop("page")
+        return meta
+
+    def count(self) -> int:
+        """Number of stored chunks."""
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM chunks").fetchone()[0]
+
+    def append(self, chunk_metadata: Iterable[Dict[str, Any]]) -> None:
+        """
+        Insert chunk metadata rows in one transaction.
+
+        Rows are keyed by their 'chunk_index' (the FAISS row id); re-inserting
+        an existing index replaces it. Each 'content' is appended to the
+        content file first, so a failed insert only leaves unreferenced bytes.
+        """
+        chunk_metadata = list(chunk_metadata)
+        spans = self._write_contents(meta["content"] for meta in chunk_metadata)
+        rows = [
+            (
+                meta["chunk_index"],
+                meta["chunk_id"],
+                meta["filename"],
+                meta["chat_id"],
+                offset,
+                length,
+                meta.get("timestamp"),
+                None if meta.get("page") is None else str(meta["page"]),
+            )
+            for meta, (offset, length) in zip(chunk_metadata, spans)
+        ]
+        with self._connect() as conn:
+            conn.executemany(
+                f"INSERT OR REPLACE INTO chunks ({', '.join(_COLUMNS)}) "
+                f"VALUES ({', '.join('?' * len(_COLUMNS))})",
+                rows
+            )
+
+    def get_many(self, indices: Iterable[int]) -> Dict[int, Dict[str, Any]]:
+        """
+        Fetch metadata for the given FAISS row ids.
+
+        Returns:
+            Dict mapping row id to metadata; missing ids are absent
+        """
+        wanted = [int(i) for i in indices if i >= 0]
+        results: Dict[int, Dict[str, Any]] = {}
+        if not wanted:
+            return results
+
+        with self._connect() as conn:
+            for start in range(0, len(wanted), _MAX_PARAMS):
+                batch = wanted[start:start + _MAX_PARAMS]
+                placeholders = ", ".join("?" * len(batch))
+                for row in conn.execute(
+                    f"SELECT * FROM chunks WHERE idx IN ({placeholders})", batch
+                ):
+                    meta = self._to_dict(row)
+                    results[meta["chunk_index"]] = meta
+        return results
+
+    def get_by_filenames(self, filenames: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """
+        Fetch all chunks, optionally restricted to the given filenames.
+
+        Returns:
+            Metadata dicts ordered by FAISS row id
+        """
+        with self._connect() as conn:
+            if not filenames:
+                cursor = conn.execute("SELECT * FROM chunks ORDER BY idx")
+                return [self._to_dict(row) for row in cursor]
+
+            # Batched like get_many to stay under SQLite's variable limit
+            wanted = list(dict.fromkeys(filenames))
+            results = []
+            for start in range(0, len(wanted), _MAX_PARAMS):
+                batch = wanted[start:start + _MAX_PARAMS]
+                placeholders = ", ".join("?" * len(batch))
+                results.extend(
+                    self._to_dict(row) for row in conn.execute(
+                        f"SELECT * FROM chunks WHERE filename IN ({placeholders})", batch
+                    )
+                )
+        results.sort(key=lambda meta: meta["chunk_index"])
+        return results
+
+    def import_legacy(self, metadata: List[Dict[str, Any]]) -> int:
+        """
+        Import a legacy in-memory metadata list (position == FAISS row id).
+
+        Returns:
+            Number of rows imported
+        """
+        rows = []
+        for idx, meta in enumerate(metadata):
+            meta = dict(meta)
+            meta["chunk_index"] = idx
+            rows.append(meta)
+        self.append(rows)
+        logger.info(f"✅ Imported {len(rows)} legacy metadata entries into {self.db_path.name}")
+        return len(rows)
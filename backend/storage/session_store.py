@@ -0,0 +1,227 @@
+"""
+Chat Session Store
+Chat sessions (file records + message history) kept in process memory or,
+when REDIS_URL is set, in Redis so several uvicorn workers can share them
+"""
+
+import json
+import logging
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Set
+
+from pydantic import BaseModel
+
+try:
+    import redis.asyncio as aioredis
+    from redis.exceptions import WatchError
+    REDIS_AVAILABLE = True
+except ImportError:
+    aioredis = None
+    WatchError = None
+    REDIS_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+
+class ChatSession(BaseModel):
+    session_id: str
+    created_at: datetime
+    messages: List[Dict] = []
+    files: List[Dict] = []
+
+
+class InMemorySessionStore:
+    """Sessions held in a module-level dict (single worker only).
+
+    File records are also indexed by file_id, together with the set of
+    currently selected ids, so selection updates touch only the records
+    whose flag changes.
+    """
+
+    def __init__(self):
+        self._sessions: Dict[str, ChatSession] = {}
+        self._files_by_id: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self._selected_ids: Dict[str, Set[str]] = {}
+
+    async def create(self, session: ChatSession) -> None:
+        self._sessions[session.session_id] = session
+        self._files_by_id[session.session_id] = {}
+        self._selected_ids[session.session_id] = set()
+        self._index_files(session.session_id, session.files)
+
+    def _index_files(self, session_id: str, records: List[Dict[str, Any]]) -> None:
+        files_by_id = self._files_by_id[session_id]
+        selected_ids = self._selected_ids[session_id]
+        for file_record in records:
+            file_id = file_record.get("file_id")
+            files_by_id[file_id] = file_record
+            if file_record.get("selected"):
+                selected_ids.add(file_id)
+
+    async def exists(self, session_id: str) -> bool:
+        return session_id in self._sessions
+
+    async def count(self) -> int:
+        return len(self._sessions)
+
+    async def get_files(self, session_id: str) -> Optional[List[Dict[str, Any]]]:
+        session = self._sessions.get(session_id)
+        return None if session is None else session.files
+
+    async def add_files(self, session_id: str, records: List[Dict[str, Any]]) -> None:
+        session = self._sessions.get(session_id)
+        if session is not None:
+            session.files.extend(records)
+            self._index_files(session_id, records)
+
+    async def set_selected(self, session_id: str, selected_file_ids: List[str]) -> bool:
+        if session_id not in self._sessions:
+            return False
+        files_by_id = self._files_by_id[session_id]
+        previous = self._selected_ids[session_id]
+        selected = {file_id for file_id in selected_file_ids if file_id in files_by_id}
+        for file_id in previous - selected:
+            files_by_id[file_id]["selected"] = False
+        for file_id in selected - previous:
+            files_by_id[file_id]["selected"] = True
+        self._selected_ids[session_id] = selected
+        return True
+
+    async def append_messages(self, session_id: str, messages: List[Dict[str, Any]]) -> None:
+        session = self._sessions.get(session_id)
+        if session is not None:
+            session.messages.extend(messages)
+
+    async def get_messages(self, session_id: str) -> List[Dict[str, Any]]:
+        session = self._sessions.get(session_id)
+        return [] if session is None else session.messages
+
+    async def close(self) -> None:
+        pass
+
+
+class RedisSessionStore:
+    """Sessions stored in Redis, shared across workers and restarts.
+
+    The session header and file records live under ``chatsess:{id}`` as
+    JSON; messages are a separate list ``chatsess:{id}:msgs`` so each turn
+    is an O(1) RPUSH instead of rewriting the whole session. Live ids are
+    tracked in a sorted set scored by expiry time, so sessions that expire
+    drop out of the count.
+    """
+
+    KEY_PREFIX = "chatsess:"
+    INDEX_KEY = "chatsess:expiry"
+
+    def __init__(self, url: str, ttl_seconds: int = 86400):
+        """
+        Initialize the Redis client.
+
+        Args:
+            url: Redis connection URL (e.g. "redis://localhost:6379/0")
+            ttl_seconds: Expiry applied to session keys on every write
+        """
+        self.ttl_seconds = ttl_seconds
+        self._redis = aioredis.Redis.from_url(url, decode_responses=True)
+
+    def _key(self, session_id: str) -> str:
+        return f"{self.KEY_PREFIX}{session_id}"
+
+    def _messages_key(self, session_id: str) -> str:
+        return f"{self.KEY_PREFIX}{session_id}:msgs"
+
+    def _touch_index(self, pipe, session_id: str) -> None:
+        """Queue an index update matching the expiry just set on the session keys."""
+        pipe.zadd(self.INDEX_KEY, {session_id: time.time() + self.ttl_seconds})
+
+    async def create(self, session: ChatSession) -> None:
+        key = self._key(session.session_id)
+        async with self._redis.pipeline(transaction=True) as pipe:
+            pipe.set(key, session.model_dump_json(exclude={"messages"}), ex=self.ttl_seconds)
+            self._touch_index(pipe, session.session_id)
+            await pipe.execute()
+
+    async def exists(self, session_id: str) -> bool:
+        return bool(await self._redis.exists(self._key(session_id)))
+
+    async def count(self) -> int:
+        async with self._redis.pipeline(transaction=True) as pipe:
+            pipe.zremrangebyscore(self.INDEX_KEY, "-inf", time.time())
+            pipe.zcard(self.INDEX_KEY)
+            _, live = await pipe.execute()
+        return live
+
+    async def get_files(self, session_id: str) -> Optional[List[Dict[str, Any]]]:
+        raw = await self._redis.get(self._key(session_id))
+        return None if raw is None else json.loads(raw).get("files", [])
+
+    async def _update_files(self, session_id: str, update) -> bool:
+        """Read-modify-write the session's file records under WATCH."""
+        key = self._key(session_id)
+        async with self._redis.pipeline(transaction=True) as pipe:
+            while True:
+                try:
+                    await pipe.watch(key)
+                    raw = await pipe.get(key)
+                    if raw is None:
+                        await pipe.unwatch()
+                        return False
+                    data = json.loads(raw)
+                    update(data.setdefault("files", []))
+                    pipe.multi()
+                    pipe.set(key, json.dumps(data), ex=self.ttl_seconds)
+                    self._touch_index(pipe, session_id)
+                    await pipe.execute()
+                    return True
+                except WatchError:
+                    # Another worker changed the session; retry on fresh data
+                    continue
+
+    async def add_files(self, session_id: str, records: List[Dict[str, Any]]) -> None:
+        await self._update_files(session_id, lambda files: files.extend(records))
+
+    async def set_selected(self, session_id: str, selected_file_ids: List[str]) -> bool:
+        selected = set(selected_file_ids)
+
+        def mark(files: List[Dict[str, Any]]) -> None:
+            for file_record in files:
+                file_record["selected"] = file_record.get("file_id") in selected
+
+        return await self._update_files(session_id, mark)
+
+    async def append_messages(self, session_id: str, messages: List[Dict[str, Any]]) -> None:
+        if not await self.exists(session_id):
+            return
+        key = self._messages_key(session_id)
+        async with self._redis.pipeline(transaction=True) as pipe:
+            pipe.rpush(key, *(json.dumps(message, default=str) for message in messages))
+            pipe.expire(key, self.ttl_seconds)
+            pipe.expire(self._key(session_id), self.ttl_seconds)
+            self._touch_index(pipe, session_id)
+            await pipe.execute()
+
+    async def get_messages(self, session_id: str) -> List[Dict[str, Any]]:
+        return [json.loads(raw) for raw in await self._redis.lrange(self._messages_key(session_id), 0, -1)]
+
+    async def close(self) -> None:
+        await self._redis.aclose()
+
+
+def create_session_store(redis_url: Optional[str] = None, ttl_seconds: int = 86400):
+    """
+    Create the session store for this process.
+
+    Args:
+        redis_url: Redis URL; empty or None keeps sessions in memory
+        ttl_seconds: Redis key expiry
+
+    Returns:
+        RedisSessionStore if configured and redis is installed, else InMemorySessionStore
+    """
+    if redis_url:
+        if REDIS_AVAILABLE:
+            logger.info(f"✅ Using Redis session store at {redis_url}")
+            return RedisSessionStore(redis_url, ttl_seconds)
+        logger.warning("⚠️ REDIS_URL is set but redis is not installed; using in-memory sessions")
+    return InMemorySessionStore()
@@ -0,0 +1,134 @@
+"""
+Summary Index
+SQLite listing of saved summaries, so listing them is one query instead
+of a directory scan that parses every metadata file
+"""
+
+import logging
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Concurrent metadata reads during backfill
+BACKFILL_MAX_WORKERS = 64
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS summaries (
+    base_name TEXT PRIMARY KEY,
+    filename TEXT NOT NULL,
+    saved_at TEXT,
+    user_id TEXT,
+    length INTEGER NOT NULL DEFAULT 0,
+    document_type TEXT NOT NULL DEFAULT 'Unknown'
+);
+CREATE INDEX IF NOT EXISTS idx_summaries_saved_at ON summaries(saved_at);
+"""
+
+
+class SummaryIndex:
+    """One row per saved summary, mirroring the fields /list returns."""
+
+    def __init__(self, db_path: Path):
+        """
+        Initialize the index, creating the database if needed.
+
+        Args:
+            db_path: Path of the SQLite file
+        """
+        self.db_path = Path(db_path)
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """Open a short-lived connection that commits on success."""
+        conn = sqlite3.connect(str(self.db_path))
+        try:
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _row(base_name: str, metadata: Dict[str, Any]) -> tuple:
+        return (
+            base_name,
+            metadata.get("filename", f"{base_name}_summary"),
+            metadata.get("saved_at"),
+            metadata.get("user_id"),
+            metadata.get("length", 0),
+            metadata.get("document_type", "Unknown"),
+        )
+
+    def upsert(self, base_name: str, metadata: Dict[str, Any]) -> None:
+        """Insert or replace the row for one summary."""
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO summaries "
+                "(base_name, filename, saved_at, user_id, length, document_type) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                self._row(base_name, metadata)
+            )
+
+    def list(self) -> List[Dict[str, Any]]:
+        """All summaries, most recently saved first."""
+        with self._connect() as conn:
+            return [
+                {
+                    "filename": row["filename"],
+                    "saved_at": row["saved_at"],
+                    "user_id": row["user_id"],
+                    "length": row["length"],
+                    "document_type": row["document_type"],
+                }
+                for row in conn.execute("SELECT * FROM summaries ORDER BY saved_at DESC")
+            ]
+
+    def backfill(self, summary_dir: Path, load_metadata: Callable[[Path], Dict[str, Any]]) -> int:
+        """
+        Populate an empty index from the metadata files already on disk.
+
+        Args:
+            summary_dir: Directory holding *_summary.json files
+            load_metadata: Parses one metadata file
+
+        Returns:
+            Number of rows added
+        """
+        with self._connect() as conn:
+            if conn.execute("SELECT COUNT(*) FROM summaries").fetchone()[0]:
+                return 0
+
+        meta_files = list(Path(summary_dir).glob("*_summary.json"))
+
+        def read_row(meta_file: Path) -> Optional[tuple]:
+            try:
+                base_name = meta_file.stem[:-len("_summary")]
+                return self._row(base_name, load_metadata(meta_file))
+            except Exception as e:
+                logger.warning(f"⚠️ Failed to index {meta_file}: {e}")
+                return None
+
+        # Many small reads: keep them in flight together instead of one by one
+        rows = []
+        if meta_files:
+            with ThreadPoolExecutor(max_workers=min(BACKFILL_MAX_WORKERS, len(meta_files))) as pool:
+                rows = [row for row in pool.map(read_row, meta_files) if row is not None]
+
+        if rows:
+            with self._connect() as conn:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO summaries "
+                    "(base_name, filename, saved_at, user_id, length, document_type) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    rows
+                )
+            logger.info(f"✅ Indexed {len(rows)} existing summaries")
+        return len(rows)
@@ -4,15 +4,24 @@ Summary Generation and Management Routes
 Handles automatic saving, retrieval, combining, and condensing of summaries
 """
 
+import functools
 import os
-import json
 import asyncio
 import logging
+from collections import OrderedDict
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
+import orjson
 from datetime import datetime
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Callable, Optional, Tuple
+
+try:
+    import aiofiles
+    AIOFILES_AVAILABLE = True
+except ImportError:
+    aiofiles = None
+    AIOFILES_AVAILABLE = False
 
 # Import local modules
 from models_local.ollama_model import OllamaModel
@@ -20,6 +29,10 @@ from document_processor.enhanced_ocr_analyzer import EnhancedOCRAnalyzer
 from document_processor.table_extractor import TableExtractor
 from document_processor.chunker import SemanticChunker
 from document_processor.extractor import ContentExtractor
+from document_processor.pdf_text import count_pages, iter_pdf_pages
+from storage.summary_index import SummaryIndex
+from utils.llm_cache import LLMCache
+from utils.text_norm import collapse_whitespace, truncate_to_token_budget
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/api/summary", tags=["Summary"])
@@ -44,6 +57,59 @@ SUMMARY_DIR.mkdir(parents=True, exist_ok=True)
 
 logger.info(f"📁 Summary storage directory: {SUMMARY_DIR}")
 
+# Fixed instruction preambles, built once at import. Each is a constant
+# prefix of its prompts: the LLM cache hashes it once and keys on it
+# separately, and Ollama's own prompt cache may reuse its evaluation.
+SUMMARY_PREAMBLE = """You are an expert summarizer specializing in technical, legal, and tender documents.
+Generate a **detailed, factual summary** from the document content below.
+
+Guidelines:
+1. Include all key sections (Overview, Requirements, Technical Details, Timeline, Budget, Terms, Contacts, etc.)
+2. Summarize important data, numbers, and findings accurately.
+3. Use markdown headings (##) and bullet points for clarity.
+4. Be comprehensive but concise (~25–35% of the full text).
+5. Include extracted structured data if relevant.
+
+Document Context:
+"""
+
+COMBINE_PREAMBLE = """Combine the following document summaries into a single detailed report.
+
+Instructions:
+- Retain all important details, remove repetition.
+- Start with a 3–4 paragraph executive summary.
+- Then list each section clearly (Overview, Requirements, Technical Details, etc.)
+- Maintain markdown formatting.
+- Highlight key metrics and dates.
+
+"""
+
+CONDENSE_PREAMBLE = """Condense the following summary into a clear, 3-paragraph executive overview.
+Focus on the most critical information, key metrics, and action items.
+
+"""
+
+# One-row-per-summary listing, so /list doesn't scan and parse every file
+summary_index = SummaryIndex(SUMMARY_DIR / "index.sqlite")
+
+# Leading pages read for tables, analysis and the summary context
+SUMMARY_HEAD_PAGES = 20
+
+# Closing pages added to the summary context, so the budget's tail half
+# is the end of the document rather than the end of the head
+SUMMARY_TAIL_PAGES = 5
+
+# Token cap on the variable prompt text of summary, combine and condense
+# generations (head and tail kept)
+SUMMARY_CONTEXT_TOKENS = 3500
+
+# Summaries regenerated at once by /combine
+COMBINE_CONCURRENCY = 4
+
+# Repeated or near-duplicate prompts reuse earlier LLM responses.
+# main.py sets llm_cache.embed_fn to its query encoder to enable the semantic tier.
+llm_cache = LLMCache(SUMMARY_DIR / "llm_cache.db")
+
 
 # ============= REQUEST MODELS =============
 
@@ -65,30 +131,132 @@ class CondenseRequest(BaseModel):
 
 # ============= UTILITY FUNCTIONS =============
 
+# Parsed summary files keyed by path, valid while st_mtime_ns is unchanged (LRU)
+FILE_CACHE_MAX_ENTRIES = 1024
+_file_cache: "OrderedDict[Path, Tuple[int, Any]]" = OrderedDict()
+
+
+def _read_cached(path: Path, parse: Callable[[Path], Any]) -> Any:
+    """Read and parse a file, reusing the last parse while its mtime is unchanged.
+    
+    Args:
+        path: File to read
+        parse: Called with the path on a cache miss
+        
+    Returns:
+        Parsed value (shared with later callers; don't mutate it)
+        
+    Raises:
+        FileNotFoundError: If the file doesn't exist
+    """
+    mtime_ns = path.stat().st_mtime_ns
+    cached = _file_cache.get(path)
+    if cached is not None and cached[0] == mtime_ns:
+        _file_cache.move_to_end(path)
+        return cached[1]
+    
+    value = parse(path)
+    _file_cache[path] = (mtime_ns, value)
+    _file_cache.move_to_end(path)
+    if len(_file_cache) > FILE_CACHE_MAX_ENTRIES:
+        _file_cache.popitem(last=False)
+    return value
+
+
+def _parse_text(path: Path) -> str:
+    with open(path, "r", encoding="utf-8") as f:
+        return f.read()
+
+
+def _parse_json(path: Path) -> Dict[str, Any]:
+    with open(path, "rb") as f:
+        return orjson.loads(f.read())
+
+
+# Index summaries saved before the index existed
+summary_index.backfill(SUMMARY_DIR, _parse_json)
+
+
+def _write_atomic(path: Path, data: bytes) -> None:
+    """Write bytes to a temp file and rename it over path (atomic on POSIX)."""
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+async def _write_atomic_async(path: Path, data: bytes) -> None:
+    """Async _write_atomic; uses aiofiles when installed, else a worker thread."""
+    if not AIOFILES_AVAILABLE:
+        await asyncio.to_thread(_write_atomic, path, data)
+        return
+    tmp_path = path.with_name(path.name + ".tmp")
+    async with aiofiles.open(tmp_path, "wb") as f:
+        await f.write(data)
+    os.replace(tmp_path, path)
+
+
+@functools.lru_cache(maxsize=4096)
+def _paths_for(filename: str) -> Tuple[Path, Path]:
+    """Summary text and metadata paths for an original filename."""
+    base_name = Path(filename).stem
+    return SUMMARY_DIR / f"{base_name}_summary.txt", SUMMARY_DIR / f"{base_name}_summary.json"
+
+
+def _prepare_summary_files(filename: str, summary: str, metadata: Dict[str, Any]):
+    """Stamp metadata and encode both summary files.
+    
+    Returns:
+        (base_name, [(path, bytes), ...]) for the text and metadata files
+    """
+    summary_path, meta_path = _paths_for(filename)
+    base_name = summary_path.stem.removesuffix("_summary")
+    metadata["saved_at"] = datetime.now().isoformat()
+    return base_name, [
+        (summary_path, summary.encode("utf-8")),
+        (meta_path, orjson.dumps(metadata, default=list, option=orjson.OPT_INDENT_2)),
+    ]
+
+
 def save_summary(filename: str, summary: str, metadata: Dict[str, Any]) -> None:
     """Save generated summary and metadata to disk.
     
+    Each file is written to a temp file and renamed into place, so a crash
+    never leaves a truncated summary. Async endpoints use save_summary_async.
+    
     Args:
         filename: Original filename
         summary: Generated summary text
         metadata: Metadata dict with generation info
     """
     try:
-        base_name = Path(filename).stem
-        summary_path = SUMMARY_DIR / f"{base_name}_summary.txt"
-        meta_path = SUMMARY_DIR / f"{base_name}_summary.json"
+        base_name, files = _prepare_summary_files(filename, summary, metadata)
+        for path, data in files:
+            _write_atomic(path, data)
+        summary_index.upsert(base_name, metadata)
+
+        logger.info(f"💾 Summary saved: {files[0][0]}")
+        logger.info(f"📋 Metadata saved: {files[1][0]}")
+    except Exception as e:
+        logger.error(f"❌ Failed to save summary: {e}")
+        raise
 
-        # Save summary text
-        with open(summary_path, "w", encoding="utf-8") as f:
-            f.write(summary)
 
-        # Save metadata
-        metadata["saved_at"] = datetime.now().isoformat()
-        with open(meta_path, "w", encoding="utf-8") as f:
-            json.dump(metadata, f, indent=4)
+async def save_summary_async(filename: str, summary: str, metadata: Dict[str, Any]) -> None:
+    """save_summary without blocking the event loop on disk I/O.
+    
+    Args:
+        filename: Original filename
+        summary: Generated summary text
+        metadata: Metadata dict with generation info
+    """
+    try:
+        base_name, files = _prepare_summary_files(filename, summary, metadata)
+        await asyncio.gather(*(_write_atomic_async(path, data) for path, data in files))
+        await asyncio.to_thread(summary_index.upsert, base_name, metadata)
 
-        logger.info(f"💾 Summary saved: {summary_path}")
-        logger.info(f"📋 Metadata saved: {meta_path}")
+        logger.info(f"💾 Summary saved: {files[0][0]}")
+        logger.info(f"📋 Metadata saved: {files[1][0]}")
     except Exception as e:
         logger.error(f"❌ Failed to save summary: {e}")
         raise
@@ -104,12 +272,10 @@ def load_saved_summary(filename: str) -> str:
         Summary text or empty string if not found
     """
     try:
-        base_name = Path(filename).stem
-        summary_path = SUMMARY_DIR / f"{base_name}_summary.txt"
+        summary_path, _ = _paths_for(filename)
         
-        if summary_path.exists():
-            with open(summary_path, "r", encoding="utf-8") as f:
-                return f.read()
+        return _read_cached(summary_path, _parse_text)
+    except FileNotFoundError:
         return ""
     except Exception as e:
         logger.error(f"❌ Failed to load summary: {e}")
@@ -126,45 +292,80 @@ def load_saved_metadata(filename: str) -> Dict[str, Any]:
         Metadata dict or empty dict if not found
     """
     try:
-        base_name = Path(filename).stem
-        meta_path = SUMMARY_DIR / f"{base_name}_summary.json"
+        _, meta_path = _paths_for(filename)
         
-        if meta_path.exists():
-            with open(meta_path, "r", encoding="utf-8") as f:
-                return json.load(f)
+        return _read_cached(meta_path, _parse_json)
+    except FileNotFoundError:
         return {}
     except Exception as e:
         logger.error(f"❌ Failed to load metadata: {e}")
         return {}
 
 
-def extract_text_from_pdf_for_summary(file_path: Path) -> str:
-    """Extract text from PDF for summary generation.
+def _source_mtime(filename: str) -> Optional[int]:
+    """mtime (ns) of an uploaded source file, or None if it is gone."""
+    try:
+        return Path(f"./uploads/{filename}").stat().st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+
+def generate_text_cached(prompt: str, max_tokens: int, preamble: str = "") -> str:
+    """Generate with Ollama, answering from the LLM cache when possible.
+    
+    The prompt is capped at SUMMARY_CONTEXT_TOKENS and otherwise sent
+    whole, after the preamble. The preamble is always a verbatim prefix,
+    so Ollama reuses its cached evaluation instead of prefilling it again.
+    Blocking; call it through asyncio.to_thread from async code.
+    
+    Args:
+        prompt: Variable prompt text (sent after the preamble)
+        max_tokens: Maximum tokens to generate
+        preamble: Fixed instruction prefix sent before the prompt
+        
+    Returns:
+        Generated (or cached) text
+    """
+    # Hard-cap the prompt so prefill time is bounded
+    prompt = truncate_to_token_budget(prompt, SUMMARY_CONTEXT_TOKENS)
+    cached, embedding = llm_cache.lookup(prompt, prefix=preamble)
+    if cached is not None:
+        logger.info("⚡ LLM cache hit")
+        return cached
+    
+    response = ollama_client.generate_text(
+        preamble + prompt, max_tokens=max_tokens, max_prompt_chars=None
+    )
+    if response.strip() and "Error" not in response:
+        llm_cache.put(prompt, response, embedding, prefix=preamble)
+    return response
+
+
+async def extract_text_from_pdf_for_summary(file_path: Path) -> Tuple[List[str], List[str]]:
+    """Extract the leading and closing page texts from a PDF for summary generation.
+    
+    Pages are parsed in parallel worker processes, off the event loop.
+    Only the first SUMMARY_HEAD_PAGES and last SUMMARY_TAIL_PAGES pages
+    are parsed; the middle of a long document is skipped.
     
     Args:
         file_path: Path to PDF file
         
     Returns:
-        Extracted text
+        Tuple of (head page texts, tail page texts), non-empty pages only
     """
+    head, tail = [], []
     try:
-        import PyPDF2
-        
-        text = []
-        with open(file_path, 'rb') as f:
-            reader = PyPDF2.PdfReader(f)
-            for page_num, page in enumerate(reader.pages):
-                try:
-                    page_text = page.extract_text()
-                    if page_text.strip():
-                        text.append(page_text)
-                except Exception as e:
-                    logger.warning(f"⚠️ Failed to extract page {page_num}: {e}")
-        
-        return "\n".join(text)
+        num_pages = await asyncio.to_thread(count_pages, str(file_path))
+        async for page_text in iter_pdf_pages(file_path, max_pages=SUMMARY_HEAD_PAGES):
+            head.append(page_text)
+        if num_pages > SUMMARY_HEAD_PAGES:
+            tail_start = max(SUMMARY_HEAD_PAGES, num_pages - SUMMARY_TAIL_PAGES)
+            async for page_text in iter_pdf_pages(file_path, start_page=tail_start):
+                tail.append(page_text)
     except Exception as e:
         logger.error(f"❌ Error extracting text: {e}")
-        return ""
+    return head, tail
 
 
 # ============= SUMMARY GENERATION =============
@@ -197,53 +398,78 @@ async def generate_summary(req: SummaryGenerationRequest):
             raise HTTPException(status_code=404, detail=f"File not found: {req.filename}")
 
         logger.info(f"📘 Generating summary for {req.filename}")
+        source_mtime = file_path.stat().st_mtime_ns
 
-        # Extract text from PDF
-        text = extract_text_from_pdf_for_summary(file_path)
+        # Extract the leading pages (for tables and analysis) and the closing
+        # pages; the middle of a long document is never parsed
+        head_pages, tail_pages = await extract_text_from_pdf_for_summary(file_path)
+        text = "\n".join(head_pages)
+        tail_text = "\n".join(tail_pages)
         if not text.strip():
             raise HTTPException(status_code=400, detail="No text found in document")
 
-        logger.info(f"✅ Extracted {len(text)} characters from PDF")
-
-        # Extract tables
-        try:
-            tables = table_extractor.extract_tables_from_text(text)
-            tables_md = "\n\n".join([
-                table_extractor.format_table_as_markdown(t) for t in tables
-            ])
-            if tables_md.strip():
-                text += f"\n\n## Extracted Tables\n\n{tables_md}"
-            logger.info(f"✅ Extracted {len(tables)} tables")
-        except Exception as e:
-            logger.warning(f"⚠️ Table extraction failed: {e}")
-
-        # Analyze document structure
-        try:
-            analysis = ocr_analyzer.analyze_document_structure(text)
-            context = ocr_analyzer.prepare_context_for_analysis(text, analysis)
-            logger.info(f"✅ Document analysis complete: {analysis.get('document_type', 'Unknown')}")
-        except Exception as e:
-            logger.warning(f"⚠️ Structure analysis failed: {e}")
-            context = text[:2000]  # Fallback to first 2000 chars
-
-        # Build summary prompt
-        prompt = f"""You are an expert summarizer specializing in technical, legal, and tender documents.
-Generate a **detailed, factual summary** from the document content below.
+        page_count = len(head_pages) + len(tail_pages)
+        logger.info(f"✅ Extracted {len(text) + len(tail_text)} characters from {page_count} pages")
+
+        tables_md, table_count, analysis = "", 0, None
+        saved = load_saved_metadata(req.filename)
+        if saved.get("source_mtime") == source_mtime and saved.get("analysis") is not None:
+            # Source unchanged since the last summary: reuse its tables and analysis
+            tables_md = saved.get("tables_md", "")
+            table_count = saved.get("table_count", 0)
+            analysis = saved["analysis"]
+            logger.info("⚡ Reusing saved tables and analysis")
+        else:
+            # Extract tables and analyze document structure concurrently, off the event loop
+            tables_result, analysis_result = await asyncio.gather(
+                asyncio.to_thread(table_extractor.extract_tables_from_text, text),
+                asyncio.to_thread(ocr_analyzer.analyze_document_structure, text),
+                return_exceptions=True
+            )
 
-Guidelines:
-1. Include all key sections (Overview, Requirements, Technical Details, Timeline, Budget, Terms, Contacts, etc.)
-2. Summarize important data, numbers, and findings accurately.
-3. Use markdown headings (##) and bullet points for clarity.
-4. Be comprehensive but concise (~25–35% of the full text).
-5. Include extracted structured data if relevant.
+            if isinstance(tables_result, BaseException):
+                logger.warning(f"⚠️ Table extraction failed: {tables_result}")
+            else:
+                try:
+                    tables_md = "\n\n".join(
+                        table_extractor.format_table_as_markdown(t) for t in tables_result
+                    )
+                    table_count = len(tables_result)
+                    logger.info(f"✅ Extracted {table_count} tables")
+                except Exception as e:
+                    logger.warning(f"⚠️ Table extraction failed: {e}")
 
-Document Context:
-{context}
-"""
+            if isinstance(analysis_result, BaseException):
+                logger.warning(f"⚠️ Structure analysis failed: {analysis_result}")
+            else:
+                analysis = analysis_result
+
+        if tables_md.strip():
+            text += f"\n\n## Extracted Tables\n\n{tables_md}"
+
+        context = text[:2000]  # Fallback to first 2000 chars
+        if analysis is not None:
+            try:
+                context = ocr_analyzer.prepare_context_for_analysis(text, analysis)
+                logger.info(f"✅ Document analysis complete: {analysis.get('document_type', 'Unknown')}")
+            except Exception as e:
+                logger.warning(f"⚠️ Structure analysis failed: {e}")
+
+        # Collapse whitespace so the prompt budget goes to content
+        context = collapse_whitespace(context)
+
+        # Build summary prompt; the closing pages go last so the token
+        # budget's tail half covers the end of the document
+        prompt = context + "\n"
+        if tail_text.strip():
+            prompt += f"\nDOCUMENT END:\n{collapse_whitespace(tail_text)}\n"
 
         # Generate summary with Ollama
         logger.info("🤖 Generating summary with Ollama...")
-        summary = ollama_client.generate_text(prompt, max_tokens=700)
+        # Off the event loop, so concurrent generations (e.g. from /combine) overlap
+        summary = await asyncio.to_thread(
+            generate_text_cached, prompt, max_tokens=700, preamble=SUMMARY_PREAMBLE
+        )
         
         if not summary.strip() or "Error" in summary:
             raise HTTPException(status_code=500, detail="Empty or error summary returned by LLM")
@@ -257,11 +483,15 @@ Document Context:
             "user_id": req.user_id,
             "model": ollama_client.model_name,
             "length": len(summary),
-            "table_count": len(tables) if 'tables' in locals() else 0,
-            "is_scanned": analysis.get("is_scanned", False) if 'analysis' in locals() else False,
-            "document_type": analysis.get("document_type", "Unknown") if 'analysis' in locals() else "Unknown",
+            "table_count": table_count,
+            "is_scanned": analysis.get("is_scanned", False) if analysis else False,
+            "document_type": analysis.get("document_type", "Unknown") if analysis else "Unknown",
+            # Intermediate results, reused while the source is unchanged
+            "source_mtime": source_mtime,
+            "tables_md": tables_md,
+            "analysis": analysis,
         }
-        save_summary(req.filename, summary, metadata)
+        await save_summary_async(req.filename, summary, metadata)
 
         return {
             "success": True,
@@ -303,25 +533,39 @@ async def combine_summaries(req: CombineSummariesRequest):
         
         logger.info(f"🧩 Combining summaries for: {req.filenames}")
 
-        summaries = []
-        for fname in req.filenames:
-            # Try to load saved summary
+        semaphore = asyncio.Semaphore(COMBINE_CONCURRENCY)
+
+        async def load_or_generate(fname: str) -> str:
+            # Try to load saved summary, unless its source has changed since
             summary_text = load_saved_summary(fname)
-            
-            if not summary_text.strip():
+            if summary_text.strip():
+                saved_mtime = load_saved_metadata(fname).get("source_mtime")
+                if saved_mtime is None or saved_mtime == _source_mtime(fname):
+                    return summary_text
+                logger.warning(f"⚠️ {fname} changed since its summary, regenerating...")
+            else:
                 logger.warning(f"⚠️ No saved summary for {fname}, regenerating...")
-                try:
-                    gen_resp = await generate_summary(SummaryGenerationRequest(
-                        filename=fname, 
-                        session_id=req.session_id, 
-                        user_id=req.user_id
-                    ))
-                    summary_text = gen_resp["summary"]
-                except Exception as e:
-                    logger.error(f"❌ Failed to generate summary for {fname}: {e}")
-                    continue
-            
-            summaries.append(f"=== {fname} ===\n{summary_text}")
+            async with semaphore:
+                gen_resp = await generate_summary(SummaryGenerationRequest(
+                    filename=fname, 
+                    session_id=req.session_id, 
+                    user_id=req.user_id
+                ))
+            return gen_resp["summary"]
+
+        # Each distinct file once, all concurrently, in first-seen order
+        unique_filenames = list(dict.fromkeys(req.filenames))
+        results = await asyncio.gather(
+            *(load_or_generate(fname) for fname in unique_filenames),
+            return_exceptions=True
+        )
+
+        summaries = []
+        for fname, result in zip(unique_filenames, results):
+            if isinstance(result, BaseException):
+                logger.error(f"❌ Failed to generate summary for {fname}: {result}")
+                continue
+            summaries.append(f"=== {fname} ===\n{result}")
 
         if not summaries:
             raise HTTPException(
@@ -332,20 +576,12 @@ async def combine_summaries(req: CombineSummariesRequest):
         combined_input = "\n\n".join(summaries)
 
         # Build combine prompt
-        combine_prompt = f"""Combine the following document summaries into a single detailed report.
-
-Instructions:
-- Retain all important details, remove repetition.
-- Start with a 3–4 paragraph executive summary.
-- Then list each section clearly (Overview, Requirements, Technical Details, etc.)
-- Maintain markdown formatting.
-- Highlight key metrics and dates.
-
-{combined_input}
-"""
+        combine_prompt = combined_input + "\n"
 
         logger.info("🤖 Combining summaries with Ollama...")
-        combined_summary = ollama_client.generate_text(combine_prompt, max_tokens=1000)
+        combined_summary = await asyncio.to_thread(
+            generate_text_cached, combine_prompt, max_tokens=1000, preamble=COMBINE_PREAMBLE
+        )
 
         if not combined_summary.strip() or "Error" in combined_summary:
             raise HTTPException(status_code=500, detail="Failed to combine summaries")
@@ -361,7 +597,7 @@ Instructions:
             "file_count": len(summaries),
             "combined_length": len(combined_summary)
         }
-        save_summary(combo_filename, combined_summary, metadata)
+        await save_summary_async(combo_filename, combined_summary, metadata)
 
         return {
             "success": True,
@@ -398,13 +634,11 @@ async def condense_summary(req: CondenseRequest):
         
         logger.info("📝 Condensing summary...")
         
-        prompt = f"""Condense the following summary into a clear, 3-paragraph executive overview.
-Focus on the most critical information, key metrics, and action items.
-
-{req.summary_text}
-"""
+        prompt = req.summary_text + "\n"
         
-        condensed = ollama_client.generate_text(prompt, max_tokens=300)
+        condensed = await asyncio.to_thread(
+            generate_text_cached, prompt, max_tokens=300, preamble=CONDENSE_PREAMBLE
+        )
         
         if not condensed.strip() or "Error" in condensed:
             raise HTTPException(status_code=500, detail="Failed to condense summary")
@@ -469,21 +703,7 @@ async def list_summaries():
         JSON with list of saved summaries and their metadata
     """
     try:
-        summaries = []
-        
-        for meta_file in SUMMARY_DIR.glob("*_summary.json"):
-            try:
-                with open(meta_file, "r", encoding="utf-8") as f:
-                    metadata = json.load(f)
-                    summaries.append({
-                        "filename": metadata.get("filename", meta_file.stem),
-                        "saved_at": metadata.get("saved_at"),
-                        "user_id": metadata.get("user_id"),
-                        "length": metadata.get("length", 0),
-                        "document_type": metadata.get("document_type", "Unknown")
-                    })
-            except Exception as e:
-                logger.warning(f"⚠️ Failed to read {meta_file}: {e}")
+        summaries = summary_index.list()
         
         logger.info(f"📋 Listed {len(summaries)} saved summaries")
         
@@ -7,37 +7,42 @@ import logging
 logger = logging.getLogger(__name__)
 
 class ChatExporter:
+    # Built once; reportlab styles are read-only during a build
+    _STYLES = getSampleStyleSheet()
+    _TITLE_STYLE = ParagraphStyle(
+        'CustomTitle',
+        parent=_STYLES['Heading1'],
+        fontSize=24,
+        spaceAfter=30,
+    )
+
     @staticmethod
     def export_to_pdf(chat_session, output_path):
         """Export chat session to PDF"""
         try:
             doc = SimpleDocTemplate(output_path, pagesize=letter)
-            elements = []
-            styles = getSampleStyleSheet()
+            styles = ChatExporter._STYLES
+            normal, heading3 = styles['Normal'], styles['Heading3']
             
             # Title
-            title_style = ParagraphStyle(
-                'CustomTitle',
-                parent=styles['Heading1'],
-                fontSize=24,
-                spaceAfter=30,
-            )
-            elements.append(Paragraph("Chat Analysis Report", title_style))
-            elements.append(Spacer(1, 12))
+            elements = [
+                Paragraph("Chat Analysis Report", ChatExporter._TITLE_STYLE),
+                Spacer(1, 12),
+            ]
             
             # Files
             elements.append(Paragraph("Files Analyzed:", styles['Heading2']))
-            for file in chat_session.uploads:
-                elements.append(Paragraph(f"• {file.filename}", styles['Normal']))
+            elements.extend([Paragraph(f"• {file.filename}", normal) for file in chat_session.uploads])
             elements.append(Spacer(1, 20))
             
             # Messages
             elements.append(Paragraph("Chat History:", styles['Heading2']))
             for msg in chat_session.messages:
-                role_style = 'Heading3' if msg.role == 'user' else 'Normal'
-                elements.append(Paragraph(f"<b>{msg.role.upper()}:</b>", styles[role_style]))
-                elements.append(Paragraph(msg.content, styles['Normal']))
-                elements.append(Spacer(1, 12))
+                elements.extend((
+                    Paragraph(f"<b>{msg.role.upper()}:</b>", heading3 if msg.role == 'user' else normal),
+                    Paragraph(msg.content, normal),
+                    Spacer(1, 12),
+                ))
             
             doc.build(elements)
             logger.info(f"PDF exported to {output_path}")
@@ -73,23 +78,19 @@ class ChatExporter:
     def export_to_txt(chat_session, output_path):
         """Export chat session to TXT"""
         try:
-            with open(output_path, 'w', encoding='utf-8') as f:
-                f.write("=" * 80 + "\n")
-                f.write("CHAT ANALYSIS REPORT\n")
-                f.write("=" * 80 + "\n\n")
-                
-                f.write("FILES ANALYZED:\n")
-                f.write("-" * 40 + "\n")
-                for file in chat_session.uploads:
-                    f.write(f"• {file.filename}\n")
-                f.write("\n")
-                
-                f.write("CHAT HISTORY:\n")
-                f.write("-" * 40 + "\n")
-                for msg in chat_session.messages:
-                    f.write(f"\n[{msg.role.upper()}]\n")
-                    f.write(f"{msg.content}\n")
-                    f.write("-" * 40 + "\n")
+            rule = "-" * 40 + "\n"
+            parts = [
+                "=" * 80, "\nCHAT ANALYSIS REPORT\n", "=" * 80, "\n\n",
+                "FILES ANALYZED:\n", rule,
+            ]
+            parts.extend(f"• {file.filename}\n" for file in chat_session.uploads)
+            parts.extend(("\n", "CHAT HISTORY:\n", rule))
+            for msg in chat_session.messages:
+                parts.extend((f"\n[{msg.role.upper()}]\n", f"{msg.content}\n", rule))
+            
+            # One write of the whole report instead of several per message
+            with open(output_path, 'w', encoding='utf-8', buffering=1 << 20) as f:
+                f.write("".join(parts))
             
             logger.info(f"TXT exported to {output_path}")
         except Exception as e:
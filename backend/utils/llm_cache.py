@@ -0,0 +1,246 @@
+"""
+LLM Response Cache
+Two-tier prompt -> response cache: exact SHA-256 match in SQLite, then
+embedding similarity over the cached prompts with an in-memory FAISS index
+"""
+
+import functools
+import hashlib
+import logging
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+import faiss
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS llm_cache (
+    prompt_hash BLOB PRIMARY KEY,
+    prefix_hash BLOB,
+    embedding BLOB,
+    response TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_llm_cache_created ON llm_cache(created_at);
+"""
+
+
+@functools.lru_cache(maxsize=64)
+def _prefix_digest(prefix: str) -> bytes:
+    """SHA-256 of a fixed prompt prefix, computed once per prefix."""
+    return hashlib.sha256(prefix.encode("utf-8")).digest()
+
+
+class LLMCache:
+    """Persistent cache of LLM responses keyed by prompt.
+
+    Lookups try the exact prompt hash first. On a miss, and when an
+    ``embed_fn`` is configured, the prompt embedding is compared against
+    the cached prompts sent with the same prefix (inner product of unit
+    vectors = cosine) and the closest response is reused above
+    ``threshold``. Only the variable prompt is embedded, with one index per
+    prefix: a shared instruction preamble would otherwise dominate the
+    embedding and make different documents look alike. Prompts longer than
+    ``max_semantic_chars`` only use the exact tier: the encoder truncates
+    long inputs, so two prompts differing past the cut would look identical.
+    """
+
+    def __init__(
+        self,
+        db_path: Path,
+        embed_fn: Optional[Callable[[str], np.ndarray]] = None,
+        threshold: float = 0.95,
+        ttl_seconds: int = 7 * 86400,
+        max_semantic_chars: int = 2000
+    ):
+        """
+        Initialize the cache, creating the database if needed.
+
+        Args:
+            db_path: Path of the SQLite file
+            embed_fn: Callable returning a normalized (1, dim) float32 embedding
+            threshold: Minimum cosine similarity for a semantic hit
+            ttl_seconds: Entries older than this are ignored and evicted
+            max_semantic_chars: Longest prompt eligible for semantic matching
+        """
+        self.db_path = Path(db_path)
+        self.embed_fn = embed_fn
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_semantic_chars = max_semantic_chars
+        self._lock = threading.Lock()
+        # prefix digest -> similarity index over that prefix's prompts
+        self._indexes: Dict[bytes, faiss.IndexFlatIP] = {}
+        self._index_hashes: Dict[bytes, List[bytes]] = {}  # prefix digest -> FAISS row -> prompt_hash
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(llm_cache)")}
+            if "prefix_hash" not in columns:
+                # Older rows embedded prefix + prompt; they stay exact-match only
+                conn.execute("ALTER TABLE llm_cache ADD COLUMN prefix_hash BLOB")
+        self.evict_expired()
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """Open a short-lived connection that commits on success."""
+        conn = sqlite3.connect(str(self.db_path))
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _hash(prompt: str, prefix: str = "") -> bytes:
+        """Cache key; a prefix contributes its precomputed digest, not its text."""
+        if not prefix:
+            return hashlib.sha256(prompt.encode("utf-8")).digest()
+        return hashlib.sha256(_prefix_digest(prefix) + prompt.encode("utf-8")).digest()
+
+    def _embed(self, prompt: str) -> Optional[np.ndarray]:
+        if self.embed_fn is None or len(prompt) > self.max_semantic_chars:
+            return None
+        try:
+            return np.ascontiguousarray(self.embed_fn(prompt), dtype=np.float32).reshape(1, -1)
+        except Exception as e:
+            logger.warning(f"⚠️ LLM cache embedding failed: {e}")
+            return None
+
+    def _fetch(self, prompt_hash: bytes) -> Optional[str]:
+        """Response for a hash, if present and not expired."""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT response FROM llm_cache WHERE prompt_hash = ? AND created_at >= ?",
+                (prompt_hash, time.time() - self.ttl_seconds)
+            ).fetchone()
+        return None if row is None else row[0]
+
+    def _add_to_index(self, prefix_hash: bytes, prompt_hash: bytes, embedding: np.ndarray) -> None:
+        with self._lock:
+            index = self._indexes.get(prefix_hash)
+            if index is None:
+                index = self._indexes[prefix_hash] = faiss.IndexFlatIP(embedding.shape[1])
+                self._index_hashes[prefix_hash] = []
+            index.add(embedding)
+            self._index_hashes[prefix_hash].append(prompt_hash)
+
+    def lookup(self, prompt: str, prefix: str = "") -> Tuple[Optional[str], Optional[np.ndarray]]:
+        """
+        Find a cached response for a prompt.
+
+        Args:
+            prompt: Prompt text (the variable part when prefix is given)
+            prefix: Fixed prompt prefix sent before prompt
+
+        Returns:
+            (response or None, prompt embedding or None); pass the embedding
+            back to put() on a miss so the prompt isn't encoded twice
+        """
+        response = self._fetch(self._hash(prompt, prefix))
+        if response is not None:
+            return response, None
+
+        embedding = self._embed(prompt)
+        if embedding is None:
+            return None, None
+
+        prefix_hash = _prefix_digest(prefix)
+        with self._lock:
+            index = self._indexes.get(prefix_hash)
+            if index is None or index.ntotal == 0:
+                return None, embedding
+            scores, ids = index.search(embedding, 1)
+            score, row = float(scores[0][0]), int(ids[0][0])
+            match_hash = self._index_hashes[prefix_hash][row] if row >= 0 else None
+
+        if match_hash is not None and score >= self.threshold:
+            response = self._fetch(match_hash)
+            if response is not None:
+                logger.info("⚡ LLM cache semantic hit (score=%.3f)", score)
+                return response, embedding
+        return None, embedding
+
+    def put(
+        self,
+        prompt: str,
+        response: str,
+        embedding: Optional[np.ndarray] = None,
+        prefix: str = ""
+    ) -> None:
+        """
+        Store a response for a prompt.
+
+        Args:
+            prompt: Prompt sent to the LLM (the variable part when prefix is given)
+            response: LLM response
+            embedding: Embedding returned by lookup(), computed here if omitted
+            prefix: Fixed prompt prefix sent before prompt
+        """
+        prompt_hash = self._hash(prompt, prefix)
+        prefix_hash = _prefix_digest(prefix)
+        if embedding is None:
+            embedding = self._embed(prompt)
+        try:
+            with self._connect() as conn:
+                existing = conn.execute(
+                    "SELECT embedding, prefix_hash FROM llm_cache WHERE prompt_hash = ?", (prompt_hash,)
+                ).fetchone()
+                conn.execute(
+                    "INSERT OR REPLACE INTO llm_cache "
+                    "(prompt_hash, prefix_hash, embedding, response, created_at) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (
+                        prompt_hash,
+                        prefix_hash,
+                        None if embedding is None else embedding.tobytes(),
+                        response,
+                        time.time()
+                    )
+                )
+            # A refreshed entry keeps its existing FAISS row
+            if embedding is not None and (existing is None or None in existing):
+                self._add_to_index(prefix_hash, prompt_hash, embedding)
+        except Exception as e:
+            logger.warning(f"⚠️ Failed to cache LLM response: {e}")
+
+    def evict_expired(self) -> int:
+        """
+        Delete expired entries and rebuild the similarity indexes from the rest.
+
+        Returns:
+            Number of entries deleted
+        """
+        with self._connect() as conn:
+            deleted = conn.execute(
+                "DELETE FROM llm_cache WHERE created_at < ?",
+                (time.time() - self.ttl_seconds,)
+            ).rowcount
+            rows = conn.execute(
+                "SELECT prefix_hash, prompt_hash, embedding FROM llm_cache "
+                "WHERE embedding IS NOT NULL AND prefix_hash IS NOT NULL"
+            ).fetchall()
+
+        by_prefix: Dict[bytes, List[Tuple[bytes, bytes]]] = {}
+        for prefix_hash, prompt_hash, embedding in rows:
+            by_prefix.setdefault(prefix_hash, []).append((prompt_hash, embedding))
+
+        with self._lock:
+            self._indexes = {}
+            self._index_hashes = {}
+            for prefix_hash, entries in by_prefix.items():
+                vectors = np.vstack([np.frombuffer(embedding, dtype=np.float32) for _, embedding in entries])
+                self._indexes[prefix_hash] = faiss.IndexFlatIP(vectors.shape[1])
+                self._indexes[prefix_hash].add(vectors)
+                self._index_hashes[prefix_hash] = [prompt_hash for prompt_hash, _ in entries]
+
+        if deleted:
+            logger.info(f"🧹 Evicted {deleted} expired LLM cache entries")
+        return deleted
@@ -0,0 +1,95 @@
+"""
+Text Normalization
+Whitespace collapsing, control-character stripping and token budgeting for
+text sent to the LLM
+"""
+
+import functools
+import logging
+import os
+from pathlib import Path
+from typing import Optional
+
+try:
+    from tokenizers import Tokenizer
+    TOKENIZERS_AVAILABLE = True
+except ImportError:
+    Tokenizer = None
+    TOKENIZERS_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# Tokenizer used only for counting: a local tokenizer.json path or an
+# ungated hub repo (Llama's 32k SentencePiece vocab, close to Mistral's)
+BUDGET_TOKENIZER = os.getenv("BUDGET_TOKENIZER", "hf-internal-testing/llama-tokenizer")
+# Rough English average, used when the tokenizer can't be loaded
+CHARS_PER_TOKEN = 4
+TRUNCATION_MARKER = "\n...[truncated]...\n"
+
+# C0/C1 control characters other than whitespace, mapped to None for str.translate
+_CONTROL_CHARS = {
+    code: None
+    for code in (*range(0x00, 0x20), 0x7F, *range(0x80, 0xA0))
+    if chr(code) not in "\t\n\x0b\x0c\r\x1c\x1d\x1e\x1f\x85"
+}
+
+
+def collapse_whitespace(text: str) -> str:
+    """
+    Drop control characters and collapse every whitespace run to one space.
+
+    Both steps run in C (str.translate, str.split/join), one pass each,
+    with no per-character Python loop.
+
+    Args:
+        text: Raw text
+
+    Returns:
+        Normalized text with no leading or trailing whitespace
+    """
+    return " ".join(text.translate(_CONTROL_CHARS).split())
+
+
+@functools.lru_cache(maxsize=1)
+def load_budget_tokenizer() -> Optional["Tokenizer"]:
+    """
+    Load the budgeting tokenizer once; None if unavailable.
+
+    May download from the hub, so call it at startup off the event loop.
+    """
+    if not TOKENIZERS_AVAILABLE:
+        return None
+    try:
+        if Path(BUDGET_TOKENIZER).is_file():
+            return Tokenizer.from_file(BUDGET_TOKENIZER)
+        return Tokenizer.from_pretrained(BUDGET_TOKENIZER)
+    except Exception as e:
+        logger.warning(f"⚠️ Could not load tokenizer {BUDGET_TOKENIZER} ({e}), estimating tokens from length")
+        return None
+
+
+def truncate_to_token_budget(text: str, max_tokens: int = 3500) -> str:
+    """
+    Cap text at a token budget, keeping its head and tail.
+
+    Prefill cost grows with prompt length, so bounding the context bounds
+    the worst case of a generation. Text within budget is returned as is.
+
+    Args:
+        text: Text to cap
+        max_tokens: Maximum tokens kept (split evenly between head and tail)
+
+    Returns:
+        The text, or its head and tail joined by a truncation marker
+    """
+    half = max_tokens // 2
+    tokenizer = load_budget_tokenizer()
+    if tokenizer is None:
+        if len(text) <= max_tokens * CHARS_PER_TOKEN:
+            return text
+        return text[:half * CHARS_PER_TOKEN] + TRUNCATION_MARKER + text[-half * CHARS_PER_TOKEN:]
+
+    ids = tokenizer.encode(text, add_special_tokens=False).ids
+    if len(ids) <= max_tokens:
+        return text
+    return tokenizer.decode(ids[:half]) + TRUNCATION_MARKER + tokenizer.decode(ids[-half:])
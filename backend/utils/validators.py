@@ -3,23 +3,27 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+_ALLOWED = frozenset({".pdf", ".docx", ".doc", ".jpg", ".jpeg", ".png", ".bmp"})
+
 class FileValidator:
-    ALLOWED_EXTENSIONS = {".pdf", ".docx", ".doc", ".jpg", ".jpeg", ".png", ".bmp"}
+    ALLOWED_EXTENSIONS = _ALLOWED
     MAX_FILE_SIZE = 100 * 1024 * 1024  # 100MB
 
     @staticmethod
     def validate_file(file_path: Path) -> tuple:
         """Validate file before processing"""
-        # Check existence
-        if not file_path.exists():
+        # Check existence (one stat also gives the size)
+        try:
+            size = file_path.stat().st_size
+        except FileNotFoundError:
             return False, "File does not exist"
         
         # Check extension
-        if file_path.suffix.lower() not in FileValidator.ALLOWED_EXTENSIONS:
-            return False, f"File type not supported. Allowed: {FileValidator.ALLOWED_EXTENSIONS}"
+        if file_path.suffix.lower() not in _ALLOWED:
+            return False, f"File type not supported. Allowed: {', '.join(sorted(_ALLOWED))}"
         
         # Check size
-        if file_path.stat().st_size > FileValidator.MAX_FILE_SIZE:
+        if size > FileValidator.MAX_FILE_SIZE:
             return False, "File size exceeds maximum limit"
         
-        return True, "File is valid"
\ No newline at end of file
+        return True, "File is valid"